@@ -2,6 +2,7 @@
 Simplified server configuration for local development
 """
 import os
+import json
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -46,6 +47,43 @@ AZURE_OPENAI_ENDPOINT = os.environ.get('AZURE_OPENAI_ENDPOINT')
 AZURE_OPENAI_API_VERSION = os.environ.get('AZURE_OPENAI_API_VERSION', '2024-02-01')
 AZURE_OPENAI_CHAT_DEPLOYMENT_NAME = os.environ.get('AZURE_OPENAI_CHAT_DEPLOYMENT_NAME')
 
+# Optional extra Azure OpenAI deployments to spread load across, as a JSON list:
+# [{"endpoint": "...", "api_key": "...", "deployment": "..."}, ...]
+# They are added after the deployment configured above
+DEPLOYMENT_KEYS = ('endpoint', 'api_key', 'deployment')
+
+
+def _parse_deployments(raw: str) -> list:
+    """Parse AZURE_OPENAI_DEPLOYMENTS, or return [] with a warning if it is malformed"""
+    try:
+        deployments = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logging.warning(f"⚠️ Ignoring invalid AZURE_OPENAI_DEPLOYMENTS: {e}")
+        return []
+    if not isinstance(deployments, list) or not all(
+        isinstance(deployment, dict) and all(isinstance(deployment.get(key), str) and deployment[key] for key in DEPLOYMENT_KEYS)
+        for deployment in deployments
+    ):
+        logging.warning(f"⚠️ Ignoring invalid AZURE_OPENAI_DEPLOYMENTS: expected a list of objects with {', '.join(DEPLOYMENT_KEYS)}")
+        return []
+    return [{key: deployment[key] for key in DEPLOYMENT_KEYS} for deployment in deployments]
+
+
+AZURE_OPENAI_DEPLOYMENTS = [
+    {
+        'endpoint': AZURE_OPENAI_ENDPOINT,
+        'api_key': AZURE_OPENAI_API_KEY,
+        'deployment': AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
+    }
+]
+if os.environ.get('AZURE_OPENAI_DEPLOYMENTS'):
+    _extra_deployments = _parse_deployments(os.environ['AZURE_OPENAI_DEPLOYMENTS'])
+    if not AZURE_OPENAI_CHAT_DEPLOYMENT_NAME and _extra_deployments:
+        # No primary deployment configured, so the extra ones make up the pool
+        AZURE_OPENAI_DEPLOYMENTS = _extra_deployments
+    else:
+        AZURE_OPENAI_DEPLOYMENTS += _extra_deployments
+
 # Check if we have Azure OpenAI keys
 HAS_LLM_KEYS = bool(AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_CHAT_DEPLOYMENT_NAME)
 
@@ -53,6 +91,16 @@ if not HAS_LLM_KEYS:
     print("✅ POC Mode: Using demo AI responses (no API keys needed)")
     print("💡 Add AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, and AZURE_OPENAI_CHAT_DEPLOYMENT_NAME to .env for real AI responses")
 
+# Semantic cache embedding model (optional) - directory of an INT8-quantized
+# ONNX export of all-MiniLM-L6-v2; the PyTorch model is used when unset
+SEMANTIC_CACHE_ONNX_MODEL_DIR = os.environ.get('SEMANTIC_CACHE_ONNX_MODEL_DIR')
+
+# Redis for short-lived Calendar response caching (optional) - caching is off when unset
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Simulated latency of the mock Graph API calls in milliseconds - none by default
+MOCK_LATENCY_MS = float(os.environ.get('MOCK_LATENCY_MS', '0'))
+
 # Google OAuth Configuration (optional)
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -3,26 +3,76 @@ Gmail Connector
 Integration with Gmail API using existing Google OAuth infrastructure
 """
 from typing import Optional, Dict, Any, List
+import asyncio
+import hashlib
+import json
 import logging
 import base64
 import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
+from cachetools import LRUCache
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 from google.auth.transport.requests import Request
 
 from .models import EmailDraft, SendResult, EmailMessage
 
 
+# Each service holds its discovery document and an httplib2 client, so only
+# the most recently used tokens keep one
+SERVICE_CACHE_SIZE = 128
+
+# Gmail's discovery document bundled with the client library, parsed once for
+# the process instead of on every service build
+_discovery_doc: Optional[Dict[str, Any]] = None
+
+
+# Gmail calls block on network I/O, so they run on a dedicated thread pool
+# rather than on the event loop
+GMAIL_API_WORKERS = 16
+_executor = ThreadPoolExecutor(max_workers=GMAIL_API_WORKERS, thread_name_prefix='gmail-api')
+
+# httplib2.Http is not thread-safe, so each worker thread keeps its own
+_thread_local = threading.local()
+
+
+def _execute_request(request):
+    """Execute a request over the calling thread's Http with the service's credentials"""
+    credentials = getattr(request.http, 'credentials', None)
+    if credentials is None:
+        return request.execute()
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = build_http()
+    return request.execute(http=AuthorizedHttp(credentials, http=http))
+
+
+def _build_gmail_service(**kwargs):
+    """Build a Gmail service from the parsed bundled discovery document"""
+    global _discovery_doc
+    if _discovery_doc is None:
+        doc = get_static_doc('gmail', 'v1')
+        if doc is None:
+            return build('gmail', 'v1', **kwargs)
+        _discovery_doc = json.loads(doc)
+    return build_from_document(_discovery_doc, **kwargs)
+
+
 class GmailConnector:
     """Wrapper around Gmail API for email operations"""
     
     def __init__(self):
-        self.service_cache = {}  # Cache Gmail service instances by access token
+        # Gmail service instances keyed by a digest of the access token
+        self.service_cache: LRUCache = LRUCache(maxsize=SERVICE_CACHE_SIZE)
         logging.info("GmailConnector initialized")
         
         # Log SSL and network environment info for debugging
@@ -34,15 +84,26 @@ class GmailConnector:
             if os.getenv(var):
                 logging.info(f"Proxy detected: {var}={os.getenv(var)}")
     
+    @staticmethod
+    def _token_key(access_token: str) -> bytes:
+        """Digest of an access token, so raw tokens are not kept as cache keys"""
+        return hashlib.blake2b(access_token.encode(), digest_size=16).digest()
+
+    async def _execute(self, request):
+        """Run a Gmail API request on the worker pool without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(_executor, _execute_request, request)
+
     def _get_gmail_service(self, access_token: str):
         """Get or create Gmail API service instance with SSL handling"""
-        if access_token not in self.service_cache:
+        key = self._token_key(access_token)
+        service = self.service_cache.get(key)
+        if service is None:
             credentials = Credentials(token=access_token)
             
             try:
                 # Try with default settings first
-                service = build('gmail', 'v1', credentials=credentials)
-                self.service_cache[access_token] = service
+                service = _build_gmail_service(credentials=credentials)
+                self.service_cache[key] = service
                 logging.info("Gmail service created successfully with default settings")
                 
             except Exception as e:
@@ -52,8 +113,8 @@ class GmailConnector:
                 try:
                     import httplib2
                     http = httplib2.Http(disable_ssl_certificate_validation=True)
-                    service = build('gmail', 'v1', credentials=credentials, http=http)
-                    self.service_cache[access_token] = service
+                    service = _build_gmail_service(credentials=credentials, http=http)
+                    self.service_cache[key] = service
                     logging.info("Gmail service created successfully with SSL validation disabled")
                     
                 except Exception as e2:
@@ -61,7 +122,7 @@ class GmailConnector:
                     # Re-raise the original error
                     raise e
                     
-        return self.service_cache[access_token]
+        return service
     
     async def send_email(
         self,
@@ -84,10 +145,10 @@ class GmailConnector:
             
             # Send via Gmail API
             service = self._get_gmail_service(access_token)
-            sent_message = service.users().messages().send(
+            sent_message = await self._execute(service.users().messages().send(
                 userId='me',
                 body=message
-            ).execute()
+            ))
             
             logging.info(f"Email sent successfully: {sent_message['id']}")
             
@@ -156,23 +217,23 @@ class GmailConnector:
             service = self._get_gmail_service(access_token)
             
             # List messages
-            results = service.users().messages().list(
+            results = await self._execute(service.users().messages().list(
                 userId='me',
                 maxResults=max_results,
                 q=query or ''
-            ).execute()
+            ))
             
             messages = results.get('messages', [])
             
             # Fetch details for each message
             email_list = []
             for msg in messages:
-                msg_detail = service.users().messages().get(
+                msg_detail = await self._execute(service.users().messages().get(
                     userId='me',
                     id=msg['id'],
                     format='metadata',
                     metadataHeaders=['From', 'To', 'Subject', 'Date']
-                ).execute()
+                ))
                 
                 headers = {h['name']: h['value'] for h in msg_detail.get('payload', {}).get('headers', [])}
                 
@@ -204,10 +265,10 @@ class GmailConnector:
         try:
             service = self._get_gmail_service(access_token)
             
-            thread = service.users().threads().get(
+            thread = await self._execute(service.users().threads().get(
                 userId='me',
                 id=thread_id
-            ).execute()
+            ))
             
             messages = []
             for msg in thread.get('messages', []):
@@ -275,7 +336,7 @@ class GmailConnector:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    results = service.users().messages().list(**params).execute()
+                    results = await self._execute(service.users().messages().list(**params))
                     break
                 except Exception as e:
                     error_str = str(e)
@@ -283,8 +344,7 @@ class GmailConnector:
                         logging.warning(f"SSL error on attempt {attempt + 1}/{max_retries}: {error_str}")
                         if attempt < max_retries - 1:
                             # Clear service cache to force recreation
-                            if access_token in self.service_cache:
-                                del self.service_cache[access_token]
+                            self.service_cache.pop(self._token_key(access_token), None)
                             # Re-get service (will recreate with SSL fallback)
                             service = self._get_gmail_service(access_token)
                             continue
@@ -358,11 +418,11 @@ class GmailConnector:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    msg_data = service.users().messages().get(
+                    msg_data = await self._execute(service.users().messages().get(
                         userId='me',
                         id=message_id,
                         format='full'
-                    ).execute()
+                    ))
                     break
                 except Exception as e:
                     error_str = str(e)
@@ -370,8 +430,7 @@ class GmailConnector:
                         logging.warning(f"SSL error fetching email {message_id} on attempt {attempt + 1}/{max_retries}: {error_str}")
                         if attempt < max_retries - 1:
                             # Clear service cache to force recreation
-                            if access_token in self.service_cache:
-                                del self.service_cache[access_token]
+                            self.service_cache.pop(self._token_key(access_token), None)
                             # Re-get service
                             service = self._get_gmail_service(access_token)
                             continue
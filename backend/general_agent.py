@@ -1,109 +1,82 @@
 """
 General Purpose Agent for Tasks, Q&A, and Planning
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple
 from langchain_openai import AzureChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from datetime import datetime
+from openai import RateLimitError
+from datetime import datetime, timedelta
+import contextlib
+import functools
+import itertools
+import json
 import logging
-from config import (
-    AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION, AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
+import re
+import time
+from semantic_cache import SemanticCache, prior_turns
+from config import AZURE_OPENAI_API_VERSION, AZURE_OPENAI_DEPLOYMENTS
+
+# Request classification keywords: single words are matched against the
+# request's tokens, multi-word phrases by substring
+_WORD_RE = re.compile(r"[a-z][a-z-]*")
+
+TASK_KWS = frozenset({
+    "task", "todo", "to-do", "reminder", "schedule", "deadline", "complete",
+    "finish", "done"
+})
+TASK_PHRASES = ("add task", "create task", "manage tasks", "remind me")
+
+PLANNING_KWS = frozenset({
+    "plan", "planning", "goal", "strategy", "roadmap", "timeline", "organize", "structure"
+})
+PLANNING_PHRASES = ("project plan", "break down")
+
+QUESTION_KWS = frozenset({"what", "how", "why", "when", "where", "who", "explain"})
+QUESTION_PHRASES = ("tell me", "help me understand", "can you", "do you know")
+
+# Simple "add a task" commands are answered from a template without an LLM call.
+# "task" must be followed by a colon or by the task itself, not by a word that
+# makes it a request about tasks ("create a task list for ...")
+ADD_TASK_RE = re.compile(
+    r"^(?:add|create|new)\s+(?:a\s+)?task"
+    r"(?::\s*|\s+(?!(?:lists?|plans?|planning|management|manager|breakdown|tracker|tracking|board|"
+    r"templates?|system|structure|schedule|for|that|which|with)\b))(?:to\s+)?(.+)$",
+    re.I
 )
+REMIND_ME_RE = re.compile(r"^remind\s+me\s+to\s+(.+)$", re.I)
 
 
-class GeneralTaskAgent:
-    """Agent for handling general tasks, Q&A, and planning"""
+# Upper bounds on the agent context and conversation history interpolated into prompts
+MAX_CONTEXT_CHARS = 4000
+MAX_HISTORY_CHARS = 4000
 
-    def __init__(self):
-        try:
-            self.llm = AzureChatOpenAI(
-                azure_endpoint=AZURE_OPENAI_ENDPOINT,
-                azure_deployment=AZURE_OPENAI_CHAT_DEPLOYMENT_NAME,
-                api_version=AZURE_OPENAI_API_VERSION,
-                api_key=AZURE_OPENAI_API_KEY,
-                temperature=0.3,
-                timeout=60,  # 60 second timeout
-                max_retries=2
-            )
-            logging.info("GeneralTaskAgent initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize GeneralTaskAgent: {str(e)}")
-            raise
 
-    async def process_request(self, agent_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process general tasks, questions, and planning requests"""
-        try:
-            user_request = agent_state.get("user_request", "")
-            conversation_history = agent_state.get("conversation_history", [])
-            context = agent_state.get("context", {})
+@functools.lru_cache(maxsize=1)
+def _date_for_minute(minute: int) -> str:
+    """Current date string, recomputed only when the minute bucket changes"""
+    return datetime.now().strftime("%Y-%m-%d")
 
-            logging.info(f"General agent processing: {user_request}")
 
-            # Determine the type of request
-            request_type = self._classify_request(user_request)
-            logging.info(f"Classified as: {request_type}")
+def _today() -> str:
+    """Current date string, cached per minute"""
+    return _date_for_minute(int(time.time()) // 60)
 
-            if request_type == "task_management":
-                logging.info("Routing to task management handler")
-                return await self._handle_task_management(user_request, conversation_history)
-            elif request_type == "question_answer":
-                logging.info("Routing to question answer handler")
-                return await self._handle_question_answer(user_request, conversation_history, context)
-            elif request_type == "planning":
-                logging.info("Routing to planning handler")
-                return await self._handle_planning(user_request, conversation_history)
-            else:
-                logging.info("Routing to general assistance handler")
-                return await self._handle_general_assistance(user_request, conversation_history)
-        
-        except Exception as e:
-            logging.error(f"General agent error: {str(e)}")
-            return {
-                "status": "error",
-                "result": {},
-                "message": f"❌ General agent failed: {str(e)}",
-                "collaboration_data": {
-                    "error": str(e),
-                    "failed_at": datetime.now().isoformat()
-                }
-            }
 
-    def _classify_request(self, user_request: str) -> str:
-        """Classify the type of request"""
-        request_lower = user_request.lower()
+def _format_history(conversation_history: List[str]) -> str:
+    """Join the last five messages, keeping at most the newest MAX_HISTORY_CHARS"""
+    if not conversation_history:
+        return "No previous conversation"
+    return "\n".join(conversation_history[-5:])[-MAX_HISTORY_CHARS:]
 
-        # Task management keywords
-        task_keywords = [
-            "task", "todo", "to-do", "reminder", "schedule", "deadline", "complete",
-            "finish", "done", "add task", "create task", "manage tasks"
-        ]
-
-        # Planning keywords
-        planning_keywords = [
-            "plan", "planning", "goal", "strategy", "roadmap", "timeline",
-            "project plan", "organize", "structure", "break down"
-        ]
-
-        # Question keywords
-        question_keywords = [
-            "what", "how", "why", "when", "where", "who", "explain", "tell me",
-            "help me understand", "can you", "do you know"
-        ]
-
-        if any(keyword in request_lower for keyword in task_keywords):
-            return "task_management"
-        elif any(keyword in request_lower for keyword in planning_keywords):
-            return "planning"
-        elif any(keyword in request_lower for keyword in question_keywords) or user_request.endswith("?"):
-            return "question_answer"
-        else:
-            return "general_assistance"
 
-    async def _handle_task_management(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
-        """Handle task creation, management, and tracking"""
-        try:
-            logging.info("Starting task management handler")
-            task_prompt = ChatPromptTemplate.from_template("""
+def _format_context(context: Dict[str, Any]) -> str:
+    """Serialize agent context as compact JSON capped at MAX_CONTEXT_CHARS"""
+    if not context:
+        return "No additional context available"
+    return json.dumps(context, default=str, separators=(',', ':'))[:MAX_CONTEXT_CHARS]
+
+
+TASK_PROMPT = ChatPromptTemplate.from_template("""
             You are a task management assistant. Help the user organize and track their tasks.
 
             Current date: {current_date}
@@ -123,47 +96,7 @@ class GeneralTaskAgent:
             Be proactive in suggesting task breakdowns for complex requests.
             """)
 
-            chain = task_prompt | self.llm
-            logging.info("Invoking LLM for task management response")
-            
-            response = await chain.ainvoke({
-                "user_request": user_request,
-                "conversation_history": "\n".join(conversation_history[-5:]) if conversation_history else "No previous conversation",
-                "current_date": datetime.now().strftime("%Y-%m-%d")
-            })
-            
-            logging.info("LLM response received for task management")
-
-            return {
-                "status": "success",
-                "result": {
-                    "task_analysis": response.content,
-                    "request_type": "task_management"
-                },
-                "message": f"📋 **Task Management**\n\n{response.content}",
-                "collaboration_data": {
-                    "task_type": "general_task",
-                    "created_at": datetime.now().isoformat(),
-                    "priority_suggestions": True
-                }
-            }
-        except Exception as e:
-            logging.error(f"Task management handler error: {str(e)}")
-            return {
-                "status": "error",
-                "result": {},
-                "message": f"❌ Task management failed: {str(e)}",
-                "collaboration_data": {
-                    "error": str(e),
-                    "failed_at": datetime.now().isoformat()
-                }
-            }
-
-    async def _handle_question_answer(self, user_request: str, conversation_history: List[str], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle general questions and provide answers"""
-        try:
-            logging.info("Starting question answer handler")
-            qa_prompt = ChatPromptTemplate.from_template("""
+QA_PROMPT = ChatPromptTemplate.from_template("""
             You are a knowledgeable assistant that provides clear, accurate answers to questions.
             Use the conversation context and any available information to give comprehensive responses.
 
@@ -186,48 +119,7 @@ class GeneralTaskAgent:
             Keep responses conversational but informative.
             """)
 
-            chain = qa_prompt | self.llm
-            logging.info("Invoking LLM for Q&A response")
-            
-            response = await chain.ainvoke({
-                "user_request": user_request,
-                "conversation_history": "\n".join(conversation_history[-5:]) if conversation_history else "No previous conversation",
-                "context": str(context) if context else "No additional context available",
-                "current_date": datetime.now().strftime("%Y-%m-%d")
-            })
-            
-            logging.info("LLM response received for Q&A")
-
-            return {
-                "status": "success",
-                "result": {
-                    "answer": response.content,
-                    "request_type": "question_answer"
-                },
-                "message": f"🤔 **Question & Answer**\n\n{response.content}",
-                "collaboration_data": {
-                    "qa_type": "general_knowledge",
-                    "answered_at": datetime.now().isoformat(),
-                    "context_used": bool(context)
-                }
-            }
-        except Exception as e:
-            logging.error(f"Q&A handler error: {str(e)}")
-            return {
-                "status": "error",
-                "result": {},
-                "message": f"❌ Q&A failed: {str(e)}",
-                "collaboration_data": {
-                    "error": str(e),
-                    "failed_at": datetime.now().isoformat()
-                }
-            }
-
-    async def _handle_planning(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
-        """Handle planning requests including project planning and goal setting"""
-        try:
-            logging.info("Starting planning handler")
-            planning_prompt = ChatPromptTemplate.from_template("""
+PLANNING_PROMPT = ChatPromptTemplate.from_template("""
             You are a planning specialist. Help users create structured plans for projects, goals, and activities.
 
             Current date: {current_date}
@@ -249,48 +141,7 @@ class GeneralTaskAgent:
             Make the plan realistic and achievable.
             """)
 
-            chain = planning_prompt | self.llm
-            logging.info("Invoking LLM for planning response")
-            
-            response = await chain.ainvoke({
-                "user_request": user_request,
-                "conversation_history": "\n".join(conversation_history[-5:]) if conversation_history else "No previous conversation",
-                "current_date": datetime.now().strftime("%Y-%m-%d")
-            })
-            
-            logging.info("LLM response received for planning")
-
-            return {
-                "status": "success",
-                "result": {
-                    "plan": response.content,
-                    "request_type": "planning"
-                },
-                "message": f"📅 **Planning & Strategy**\n\n{response.content}",
-                "collaboration_data": {
-                    "plan_type": "structured_plan",
-                    "created_at": datetime.now().isoformat(),
-                    "includes_timeline": True,
-                    "includes_milestones": True
-                }
-            }
-        except Exception as e:
-            logging.error(f"Planning handler error: {str(e)}")
-            return {
-                "status": "error",
-                "result": {},
-                "message": f"❌ Planning failed: {str(e)}",
-                "collaboration_data": {
-                    "error": str(e),
-                    "failed_at": datetime.now().isoformat()
-                }
-            }
-
-    async def _handle_general_assistance(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
-        """Handle general assistance requests that don't fit other categories"""
-        try:
-            logging.info("Starting general assistance handler")
-            general_prompt = ChatPromptTemplate.from_template("""
+GENERAL_PROMPT = ChatPromptTemplate.from_template("""
             You are a helpful general assistant. Provide useful, actionable responses to user requests.
 
             Current date: {current_date}
@@ -309,37 +160,351 @@ class GeneralTaskAgent:
             Focus on being genuinely helpful and proactive.
             """)
 
-            chain = general_prompt | self.llm
-            logging.info("Invoking LLM for general assistance response")
-            
-            response = await chain.ainvoke({
-                "user_request": user_request,
-                "conversation_history": "\n".join(conversation_history[-5:]) if conversation_history else "No previous conversation",
-                "current_date": datetime.now().strftime("%Y-%m-%d")
-            })
-            
-            logging.info("LLM response received for general assistance")
+PROMPTS = {
+    "task_management": TASK_PROMPT,
+    "question_answer": QA_PROMPT,
+    "planning": PLANNING_PROMPT,
+    "general_assistance": GENERAL_PROMPT
+}
+
+
+class GeneralTaskAgent:
+    """Agent for handling general tasks, Q&A, and planning"""
+
+    def __init__(self):
+        try:
+            # One client per configured deployment; requests are spread round-robin
+            self._llms = [
+                AzureChatOpenAI(
+                    azure_endpoint=deployment['endpoint'],
+                    azure_deployment=deployment['deployment'],
+                    api_version=AZURE_OPENAI_API_VERSION,
+                    api_key=deployment['api_key'],
+                    temperature=0.3,
+                    timeout=60,  # 60 second timeout
+                    max_retries=2
+                )
+                for deployment in AZURE_OPENAI_DEPLOYMENTS
+            ]
+            self.llm = self._llms[0]
+            self._chains = {
+                request_type: [prompt | llm for llm in self._llms]
+                for request_type, prompt in PROMPTS.items()
+            }
+            self._next_deployment = itertools.count()
+            self.response_cache = SemanticCache()
+            logging.info("GeneralTaskAgent initialized successfully")
+        except Exception as e:
+            logging.error(f"Failed to initialize GeneralTaskAgent: {str(e)}")
+            raise
+
+    async def process_request(self, agent_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Process general tasks, questions, and planning requests"""
+        try:
+            user_request = agent_state.get("user_request", "")
+            conversation_history = agent_state.get("conversation_history", [])
+            context = agent_state.get("context", {})
+
+            logging.info(f"General agent processing: {user_request}")
+
+            # Determine the type of request
+            request_type = self._classify_request(user_request)
+            logging.info(f"Classified as: {request_type}")
+
+            cache_embedding, cached, conversation_history = await self._check_cache(
+                request_type, user_request, conversation_history, context
+            )
+            if cached:
+                return cached
+
+            if request_type == "task_management":
+                logging.info("Routing to task management handler")
+                result = await self._handle_task_management(user_request, conversation_history)
+            elif request_type == "question_answer":
+                logging.info("Routing to question answer handler")
+                result = await self._handle_question_answer(user_request, conversation_history, context)
+            elif request_type == "planning":
+                logging.info("Routing to planning handler")
+                result = await self._handle_planning(user_request, conversation_history)
+            else:
+                logging.info("Routing to general assistance handler")
+                result = await self._handle_general_assistance(user_request, conversation_history)
+
+            self._remember(cache_embedding, result)
+            return result
+        
+        except Exception as e:
+            logging.error(f"General agent error: {str(e)}")
+            return self._error_result("General agent", e)
+
+    async def stream_request(self, agent_state: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as the LLM generates it
 
+        Yields {"status": "streaming", "delta": ...} chunks, then the same
+        result dict process_request would have returned.
+        """
+        try:
+            user_request = agent_state.get("user_request", "")
+            conversation_history = agent_state.get("conversation_history", [])
+            context = agent_state.get("context", {})
+
+            request_type = self._classify_request(user_request)
+            logging.info(f"General agent streaming {request_type}: {user_request}")
+
+            # Cached and template answers are complete already, so they skip streaming
+            cache_embedding, cached, conversation_history = await self._check_cache(
+                request_type, user_request, conversation_history, context
+            )
+            if cached:
+                yield cached
+                return
+            if request_type == "task_management":
+                quick_result = self._quick_task_result(user_request)
+                if quick_result:
+                    yield quick_result
+                    return
+
+            parts = []
+            inputs = self._prompt_inputs(request_type, user_request, conversation_history, context)
+            async for chunk in self._run_chain(request_type, inputs, stream=True):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"status": "streaming", "delta": chunk.content, "request_type": request_type}
+
+            result = self._build_result(request_type, "".join(parts), context)
+            self._remember(cache_embedding, result)
+            yield result
+
+        except Exception as e:
+            logging.error(f"General agent streaming error: {str(e)}")
+            yield self._error_result("General agent", e)
+
+    async def _check_cache(self, request_type: str, user_request: str, conversation_history: List[str],
+                           context: Dict[str, Any]) -> Tuple[Any, Optional[Dict[str, Any]], List[str]]:
+        """Look a request up in the semantic response cache
+
+        Returns the embedding to cache the response under (None when the
+        request isn't cacheable), a cached response if one applies, and the
+        conversation history with near-duplicate messages removed.
+        """
+        if not self.response_cache.enabled:
+            return None, None, conversation_history
+
+        # Embed the request and recent history together in one model call
+        standalone = not prior_turns(conversation_history, user_request) and not context
+        recent_history = conversation_history[-5:]
+        embeddings = await self.response_cache.embed_async([user_request] + recent_history)
+        if recent_history:
+            conversation_history = self.response_cache.dedupe(recent_history, embeddings[1:])
+
+        # Standalone requests can reuse the response to a similar earlier
+        # request made the same day, as the prompts include the date
+        if not standalone:
+            return None, None, conversation_history
+        cached = self.response_cache.lookup(embeddings[0])
+        if (cached and cached["date"] == _today()
+                and cached["response"]["result"].get("request_type") == request_type):
+            logging.info("Semantic cache hit, skipping LLM call")
+            return embeddings[0], dict(cached["response"]), conversation_history
+        return embeddings[0], None, conversation_history
+
+    def _remember(self, cache_embedding, result: Dict[str, Any]) -> None:
+        """Cache a successful response under its request's embedding"""
+        if cache_embedding is not None and result.get("status") == "success":
+            self.response_cache.add(cache_embedding, {"date": _today(), "response": result})
+
+    def _quick_task_result(self, user_request: str) -> Optional[Dict[str, Any]]:
+        """Answer a simple add-task command from the template, if it is one"""
+        request = user_request.strip()
+        match = ADD_TASK_RE.match(request) or REMIND_ME_RE.match(request)
+        if not match:
+            return None
+        logging.info("Simple add-task request, answering from template")
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        task = match.group(1).strip().rstrip(".")
+        return self._build_result("task_management", f"- [ ] {task} (priority: medium, due: {tomorrow})")
+
+    def _classify_request(self, user_request: str) -> str:
+        """Classify the type of request"""
+        request_lower = user_request.lower()
+        tokens = set(_WORD_RE.findall(request_lower))
+
+        if tokens & TASK_KWS or any(phrase in request_lower for phrase in TASK_PHRASES):
+            return "task_management"
+        elif tokens & PLANNING_KWS or any(phrase in request_lower for phrase in PLANNING_PHRASES):
+            return "planning"
+        elif (tokens & QUESTION_KWS or any(phrase in request_lower for phrase in QUESTION_PHRASES)
+              or user_request.endswith("?")):
+            return "question_answer"
+        else:
+            return "general_assistance"
+
+    async def _run_chain(self, request_type: str, inputs: Dict[str, Any], stream: bool = False) -> AsyncIterator[Any]:
+        """Run a request type's chain, moving on to the next deployment when rate limited
+
+        Deployments are tried in rotation order. Yields the streamed chunks, or
+        the single response when not streaming. Output already yielded can't be
+        taken back, so a stream only fails over before its first chunk.
+        """
+        chains = self._chains[request_type]
+        start = next(self._next_deployment) % len(chains)
+        chains = chains[start:] + chains[:start]
+        for attempt, chain in enumerate(chains):
+            sent = False
+            try:
+                if stream:
+                    async for chunk in chain.astream(inputs):
+                        sent = True
+                        yield chunk
+                else:
+                    yield await chain.ainvoke(inputs)
+                return
+            except RateLimitError:
+                if sent or attempt == len(chains) - 1:
+                    raise
+                logging.warning("Azure OpenAI deployment rate limited, trying next deployment")
+
+    async def _invoke(self, request_type: str, inputs: Dict[str, Any]):
+        """Invoke a request type's chain with deployment failover"""
+        async with contextlib.aclosing(self._run_chain(request_type, inputs)) as responses:
+            async for response in responses:
+                return response
+
+    def _prompt_inputs(self, request_type: str, user_request: str, conversation_history: List[str],
+                       context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build the prompt variables for a request type"""
+        inputs = {
+            "user_request": user_request,
+            "conversation_history": _format_history(conversation_history),
+            "current_date": _today()
+        }
+        if request_type == "question_answer":
+            inputs["context"] = _format_context(context)
+        return inputs
+
+    def _build_result(self, request_type: str, content: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Wrap LLM output in the response shape for a request type"""
+        if request_type == "task_management":
+            return {
+                "status": "success",
+                "result": {
+                    "task_analysis": content,
+                    "request_type": "task_management"
+                },
+                "message": f"📋 **Task Management**\n\n{content}",
+                "collaboration_data": {
+                    "task_type": "general_task",
+                    "created_at": datetime.now().isoformat(),
+                    "priority_suggestions": True
+                }
+            }
+        elif request_type == "question_answer":
             return {
                 "status": "success",
                 "result": {
-                    "assistance": response.content,
+                    "answer": content,
+                    "request_type": "question_answer"
+                },
+                "message": f"🤔 **Question & Answer**\n\n{content}",
+                "collaboration_data": {
+                    "qa_type": "general_knowledge",
+                    "answered_at": datetime.now().isoformat(),
+                    "context_used": bool(context)
+                }
+            }
+        elif request_type == "planning":
+            return {
+                "status": "success",
+                "result": {
+                    "plan": content,
+                    "request_type": "planning"
+                },
+                "message": f"📅 **Planning & Strategy**\n\n{content}",
+                "collaboration_data": {
+                    "plan_type": "structured_plan",
+                    "created_at": datetime.now().isoformat(),
+                    "includes_timeline": True,
+                    "includes_milestones": True
+                }
+            }
+        else:
+            return {
+                "status": "success",
+                "result": {
+                    "assistance": content,
                     "request_type": "general_assistance"
                 },
-                "message": f"💡 **General Assistance**\n\n{response.content}",
+                "message": f"💡 **General Assistance**\n\n{content}",
                 "collaboration_data": {
                     "assistance_type": "general_help",
                     "provided_at": datetime.now().isoformat()
                 }
             }
+
+    def _error_result(self, label: str, error: Exception) -> Dict[str, Any]:
+        """Standard error response for a failed handler"""
+        return {
+            "status": "error",
+            "result": {},
+            "message": f"❌ {label} failed: {str(error)}",
+            "collaboration_data": {
+                "error": str(error),
+                "failed_at": datetime.now().isoformat()
+            }
+        }
+
+    async def _handle_task_management(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
+        """Handle task creation, management, and tracking"""
+        try:
+            quick_result = self._quick_task_result(user_request)
+            if quick_result:
+                return quick_result
+
+            logging.info("Invoking LLM for task management response")
+            response = await self._invoke(
+                "task_management", self._prompt_inputs("task_management", user_request, conversation_history)
+            )
+            logging.info("LLM response received for task management")
+            return self._build_result("task_management", response.content)
+        except Exception as e:
+            logging.error(f"Task management handler error: {str(e)}")
+            return self._error_result("Task management", e)
+
+    async def _handle_question_answer(self, user_request: str, conversation_history: List[str], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle general questions and provide answers"""
+        try:
+            logging.info("Invoking LLM for Q&A response")
+            response = await self._invoke(
+                "question_answer", self._prompt_inputs("question_answer", user_request, conversation_history, context)
+            )
+            logging.info("LLM response received for Q&A")
+            return self._build_result("question_answer", response.content, context)
+        except Exception as e:
+            logging.error(f"Q&A handler error: {str(e)}")
+            return self._error_result("Q&A", e)
+
+    async def _handle_planning(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
+        """Handle planning requests including project planning and goal setting"""
+        try:
+            logging.info("Invoking LLM for planning response")
+            response = await self._invoke(
+                "planning", self._prompt_inputs("planning", user_request, conversation_history)
+            )
+            logging.info("LLM response received for planning")
+            return self._build_result("planning", response.content)
+        except Exception as e:
+            logging.error(f"Planning handler error: {str(e)}")
+            return self._error_result("Planning", e)
+
+    async def _handle_general_assistance(self, user_request: str, conversation_history: List[str]) -> Dict[str, Any]:
+        """Handle general assistance requests that don't fit other categories"""
+        try:
+            logging.info("Invoking LLM for general assistance response")
+            response = await self._invoke(
+                "general_assistance", self._prompt_inputs("general_assistance", user_request, conversation_history)
+            )
+            logging.info("LLM response received for general assistance")
+            return self._build_result("general_assistance", response.content)
         except Exception as e:
             logging.error(f"General assistance handler error: {str(e)}")
-            return {
-                "status": "error",
-                "result": {},
-                "message": f"❌ General assistance failed: {str(e)}",
-                "collaboration_data": {
-                    "error": str(e),
-                    "failed_at": datetime.now().isoformat()
-                }
-            }
\ No newline at end of file
+            return self._error_result("General assistance", e)
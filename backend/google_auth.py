@@ -6,15 +6,17 @@ import os
 import jwt
 import json
 import requests
+from urllib.parse import urlencode
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
-from jose import JWTError, jwt as jose_jwt
 from pydantic import BaseModel
 import secrets
 import asyncio
+import time
+from collections import OrderedDict
 
 # Configuration for Google OAuth
 class GoogleOAuthConfig:
@@ -44,6 +46,8 @@ class GoogleOAuthConfig:
     JWT_ALGORITHM = "HS256"
     JWT_EXPIRATION_HOURS = 24
 
+_SCOPES_STR = ' '.join(GoogleOAuthConfig.SCOPES)
+
 class UserProfile(BaseModel):
     id: str
     email: str
@@ -71,14 +75,14 @@ class GoogleOAuth:
         params = {
             'client_id': self.config.CLIENT_ID,
             'redirect_uri': self.config.REDIRECT_URI,
-            'scope': ' '.join(self.config.SCOPES),
+            'scope': _SCOPES_STR,
             'response_type': 'code',
             'access_type': 'offline',
             'prompt': 'consent',
             'state': state
         }
         
-        auth_url = self.config.AUTH_URL + '?' + '&'.join([f'{k}={v}' for k, v in params.items()])
+        auth_url = f"{self.config.AUTH_URL}?{urlencode(params)}"
         
         return {
             'auth_url': auth_url,
@@ -156,34 +160,39 @@ class GoogleOAuth:
             raise HTTPException(status_code=500, detail=f"Authentication error: {str(e)}")
 
 # Session management
+SESSION_TTL_SECONDS = 24 * 3600
+
 class SessionManager:
+    """In-memory sessions; timestamps are epoch seconds from time.time()"""
+
     def __init__(self):
         self.sessions = {}
     
     def create_session(self, user_id: str, token_data: dict) -> str:
         session_id = secrets.token_urlsafe(32)
+        now = time.time()
         self.sessions[session_id] = {
             'user_id': user_id,
             'token_data': token_data,
-            'created_at': datetime.utcnow(),
-            'last_accessed': datetime.utcnow()
+            'created_at': now,
+            'last_accessed': now
         }
         return session_id
     
     def get_session(self, session_id: str) -> Optional[dict]:
         session = self.sessions.get(session_id)
         if session:
-            session['last_accessed'] = datetime.utcnow()
+            session['last_accessed'] = time.time()
         return session
     
     def delete_session(self, session_id: str):
         self.sessions.pop(session_id, None)
     
     def cleanup_expired_sessions(self):
-        now = datetime.utcnow()
+        now = time.time()
         expired_sessions = [
             session_id for session_id, session in self.sessions.items()
-            if now - session['last_accessed'] > timedelta(hours=24)
+            if now - session['last_accessed'] > SESSION_TTL_SECONDS
         ]
         for session_id in expired_sessions:
             del self.sessions[session_id]
@@ -192,37 +201,70 @@ class SessionManager:
 session_manager = SessionManager()
 security = HTTPBearer()
 
+# Decoded JWT payloads keyed by raw token; a token is immutable until it expires
+_TOKEN_CACHE_SIZE = 4096
+_token_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+def _verify(token: str) -> dict:
+    """Verify a JWT signature and expiry with PyJWT"""
+    return jwt.decode(
+        token,
+        GoogleOAuthConfig.JWT_SECRET,
+        algorithms=[GoogleOAuthConfig.JWT_ALGORITHM],
+        options={"require": ["exp"]}
+    )
+
+def _bearer_token(request: Request) -> Optional[str]:
+    """Extract the bearer token from the Authorization header"""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+def _decode_cached(token: str) -> dict:
+    """Decode a JWT, reusing the verified payload while the token is unexpired"""
+    hit = _token_cache.get(token)
+    if hit and hit[0] > time.time():
+        _token_cache.move_to_end(token)
+        return hit[1]
+    
+    payload = _verify(token)
+    _token_cache[token] = (payload['exp'], payload)
+    _token_cache.move_to_end(token)
+    if len(_token_cache) > _TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return payload
+
+def _user_from_payload(payload: dict) -> UserProfile:
+    """Build the user profile carried in a verified JWT payload"""
+    return UserProfile(
+        id=payload.get('user_id'),
+        email=payload.get('email'),
+        name=payload.get('name'),
+        picture=payload.get('picture'),
+        verified_email=True
+    )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
     try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            GoogleOAuthConfig.JWT_SECRET, 
-            algorithms=[GoogleOAuthConfig.JWT_ALGORITHM]
-        )
+        payload = _decode_cached(credentials.credentials)
         user_id = payload.get('user_id')
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        return UserProfile(
-            id=user_id,
-            email=payload.get('email'),
-            name=payload.get('name'),
-            picture=payload.get('picture'),
-            verified_email=True
-        )
-    except JWTError:
+        return _user_from_payload(payload)
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 async def is_authenticated_request(request: Request) -> bool:
     """Check if request is authenticated"""
     try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+        token = _bearer_token(request)
+        if not token:
             return False
         
-        token = auth_header.split(" ")[1]
-        jwt.decode(token, GoogleOAuthConfig.JWT_SECRET, algorithms=[GoogleOAuthConfig.JWT_ALGORITHM])
+        _decode_cached(token)
         return True
     except:
         return False
@@ -230,20 +272,13 @@ async def is_authenticated_request(request: Request) -> bool:
 async def get_user_from_request(request: Request) -> Optional[UserProfile]:
     """Get user from request"""
     try:
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+        token = _bearer_token(request)
+        if not token:
             return None
         
-        token = auth_header.split(" ")[1]
-        payload = jwt.decode(token, GoogleOAuthConfig.JWT_SECRET, algorithms=[GoogleOAuthConfig.JWT_ALGORITHM])
+        payload = _decode_cached(token)
         
-        return UserProfile(
-            id=payload.get('user_id'),
-            email=payload.get('email'),
-            name=payload.get('name'),
-            picture=payload.get('picture'),
-            verified_email=True
-        )
+        return _user_from_payload(payload)
     except:
         return None
 
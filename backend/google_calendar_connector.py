@@ -2,28 +2,397 @@
 Google Calendar Connector
 Integration with Google Calendar API using existing Google OAuth infrastructure
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import asyncio
+import hashlib
 import logging
+import random
+import re
+import secrets
+import weakref
 from datetime import datetime, timezone
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+import orjson
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
+
+# Optional Redis response cache
+try:
+    import redis.asyncio as aioredis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+# Optional C-extension ISO 8601 parser for large freebusy responses
+try:
+    import ciso8601
+    HAS_CISO8601 = True
+except ImportError:
+    HAS_CISO8601 = False
+
+from config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+CALENDAR_API_BASE = "https://www.googleapis.com/calendar/v3"
+CALENDAR_BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+BATCH_LIMIT = 50  # Google's maximum sub-requests per batch call
+FREEBUSY_ITEMS_LIMIT = 50  # Google's maximum calendars per freeBusy query
+EVENTS_PAGE_LIMIT = 250  # Google's maximum maxResults per events page
+
+# Concurrent Calendar requests allowed per access token and per process
+PER_TOKEN_CONCURRENCY = 20
+GLOBAL_CONCURRENCY = 200
+
+# Request pacing, kept under Google's ~600 requests/minute/user quota and a
+# share of the project-wide quota; batch sub-requests count individually
+PER_TOKEN_RATE_PER_MINUTE = 500
+GLOBAL_RATE_PER_MINUTE = 10_000
 
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Responses worth retrying with exponential backoff
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Partial-response masks: only the fields the connector actually reads
+EVENT_FIELDS = "id,summary,start,end,description,location,attendees/email,hangoutLink,status,recurrence"
+EVENT_LIST_FIELDS = f"items({EVENT_FIELDS}),nextPageToken"
+FREEBUSY_FIELDS = "calendars"
+
+# Resource paths built once rather than per request
+EVENTS_PATH = "/calendars/primary/events"
+EVENTS_BATCH_INSERT_PATH = f"{EVENTS_PATH}?fields={quote(EVENT_FIELDS)}"
+
+# Read results (list/search/get) are cached briefly in Redis when REDIS_URL is set
+RESPONSE_CACHE_PREFIX = "gcal:v1"
+RESPONSE_CACHE_TTL = 30
+
+_BATCH_ITEM_RE = re.compile(r"Content-ID:\s*<response-item-(\d+)>", re.I)
+_BATCH_STATUS_RE = re.compile(r"HTTP/1\.1 (\d{3})")
+_BOUNDARY_RE = re.compile(r"boundary=\"?([^\";]+)\"?")
+_TZ_SUFFIX_RE = re.compile(r"(Z|[+\-]\d\d:?\d\d)$")
+
+def _detect_tz(dt_string: str) -> Optional[str]:
+    """Time zone to send with a dateTime: None when it carries its own offset, else UTC"""
+    match = _TZ_SUFFIX_RE.search(dt_string)
+    return None if match and match.group(1) != 'Z' else 'UTC'
+
+
+def _event_time(dt_string: str) -> Dict[str, str]:
+    """Build an event start/end object, letting Google infer the zone from an explicit offset"""
+    tz = _detect_tz(dt_string)
+    return {'dateTime': dt_string, **({'timeZone': tz} if tz else {})}
+
+
+def _event_datetime(when: Dict[str, str]) -> str:
+    """dateTime of an event start/end, or date for all-day events"""
+    return when.get('dateTime') or when.get('date')
+
+
+def _format_event(event: Dict[str, Any], **extra) -> Dict[str, Any]:
+    """Shape a Calendar API event into the dict returned to agents"""
+    formatted = {
+        'id': event['id'],
+        'title': event.get('summary', ''),
+        'start': _event_datetime(event['start']),
+        'end': _event_datetime(event['end']),
+        'description': event.get('description', ''),
+        'location': event.get('location', ''),
+        'attendees': [attendee['email'] for attendee in event.get('attendees', ())],
+        'meeting_link': event.get('hangoutLink', ''),
+        'recurrence': event.get('recurrence', []),
+        'status': event.get('status', '')
+    }
+    formatted.update(extra)
+    return formatted
+
+
+def _iso_to_epoch(value: str) -> int:
+    """Convert an RFC 3339 timestamp to epoch seconds"""
+    if HAS_CISO8601:
+        return int(ciso8601.parse_datetime(value).timestamp())
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+# One HTTP/2 connection pool shared by every Calendar request in the process.
+# Auth is header-only, so a single pool serves all users.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP/2 client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            timeout=httpx.Timeout(30.0)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (call on application shutdown)"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+class CalendarAPIError(Exception):
+    """Error response returned by the Google Calendar API"""
+
+    def __init__(self, status: int, message: str, headers: Dict[str, str] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.headers = headers or {}
 
 
 class GoogleCalendarConnector:
     """Wrapper around Google Calendar API for calendar operations"""
 
     def __init__(self):
-        self.service_cache = {}  # Cache Calendar service instances by access token
-        logging.info("GoogleCalendarConnector initialized")
+        # Semaphores are only referenced while requests hold them, so idle tokens drop out
+        self._sems: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+        self._global_sem = asyncio.Semaphore(GLOBAL_CONCURRENCY)
+        # Limiters must outlive individual requests to track the rate, so they
+        # expire a while after the last use instead of being weakly held
+        self._limiters: TTLCache = TTLCache(maxsize=4096, ttl=120)
+        self._global_limiter = AsyncLimiter(GLOBAL_RATE_PER_MINUTE, 60)
+        # (token digest, event id) -> (etag, formatted event) for conditional GETs
+        self._etag_cache: TTLCache = TTLCache(maxsize=4096, ttl=600)
+        self._redis = aioredis.from_url(REDIS_URL) if HAS_REDIS and REDIS_URL else None
+        logger.info("GoogleCalendarConnector initialized")
+
+    def _sem(self, access_token: str) -> asyncio.Semaphore:
+        """Get the concurrency gate for an access token"""
+        key = self._token_key(access_token)
+        sem = self._sems.get(key)
+        if sem is None:
+            sem = asyncio.Semaphore(PER_TOKEN_CONCURRENCY)
+            self._sems[key] = sem
+        return sem
+
+    async def _acquire_rate(self, access_token: str, amount: int = 1) -> None:
+        """Wait until the token and the process may send `amount` more requests"""
+        key = self._token_key(access_token)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AsyncLimiter(PER_TOKEN_RATE_PER_MINUTE, 60)
+        # Re-insert on every use so the TTL is measured from the last request
+        self._limiters[key] = limiter
+        await limiter.acquire(amount)
+        await self._global_limiter.acquire(amount)
+
+    @staticmethod
+    def _token_key(access_token: str) -> str:
+        """Key per-token state by a digest so raw tokens are not kept around"""
+        return hashlib.sha1(access_token.encode()).hexdigest()
+
+    def _cache_key(self, access_token: str, op: str, *args) -> str:
+        """Redis key for a read operation, grouped per token for invalidation"""
+        args_digest = hashlib.sha1(orjson.dumps(args)).hexdigest()
+        return f"{RESPONSE_CACHE_PREFIX}:{self._token_key(access_token)}:{op}:{args_digest}"
+
+    async def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, or None on a miss or when Redis is unavailable"""
+        if self._redis is None:
+            return None
+        try:
+            hit = await self._redis.get(key)
+        except Exception as e:
+            logger.warning("Calendar cache read failed: %s", e)
+            return None
+        return orjson.loads(hit) if hit else None
+
+    async def _cache_set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache a successful read result for RESPONSE_CACHE_TTL seconds"""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, orjson.dumps(value), ex=RESPONSE_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Calendar cache write failed: %s", e)
+
+    async def _invalidate_cache(self, access_token: str) -> None:
+        """Drop every cached read for a token after it changes its calendar"""
+        if self._redis is None:
+            return
+        try:
+            keys = [key async for key in self._redis.scan_iter(
+                match=f"{RESPONSE_CACHE_PREFIX}:{self._token_key(access_token)}:*"
+            )]
+            if keys:
+                await self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning("Calendar cache invalidation failed: %s", e)
+
+    async def _with_retry(self, coro_fn, attempts: int = 3, base: float = 0.5, cap: float = 8.0):
+        """Run coro_fn, retrying rate-limit and server errors with jittered exponential backoff"""
+        for attempt in range(attempts):
+            try:
+                return await coro_fn()
+            except CalendarAPIError as e:
+                if e.status not in RETRYABLE_STATUSES or attempt == attempts - 1:
+                    raise
+                retry_after = e.headers.get('Retry-After', '')
+                delay = min(cap, float(retry_after)) if retry_after.isdigit() else min(cap, base * 2 ** attempt)
+                delay += random.random() * 0.25
+                logger.warning("Calendar API returned %s, retrying in %.2fs", e.status, delay)
+                await asyncio.sleep(delay)
+
+    async def _request(
+        self,
+        access_token: str,
+        method: str,
+        path: str,
+        params: Dict[str, Any] = None,
+        json_body: Dict[str, Any] = None,
+        headers: Dict[str, str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Issue a Calendar v3 REST request and return the decoded JSON body
+
+        Returns None for a 304 Not Modified reply to a conditional request.
+        """
+        # Serialize once with orjson, not on every retry by httpx's stdlib encoder
+        body = orjson.dumps(json_body) if json_body is not None else None
+        return await self._with_retry(lambda: self._send(access_token, method, path, params, body, headers))
+
+    async def _send(
+        self,
+        access_token: str,
+        method: str,
+        path: str,
+        params: Dict[str, Any] = None,
+        body: bytes = None,
+        extra_headers: Dict[str, str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Single attempt of a Calendar v3 REST request with a pre-encoded JSON body"""
+        headers = {"Authorization": f"Bearer {access_token}", **(extra_headers or {})}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        await self._acquire_rate(access_token)
+        async with self._sem(access_token), self._global_sem:
+            resp = await get_http_client().request(
+                method,
+                f"{CALENDAR_API_BASE}{path}",
+                params=params,
+                content=body,
+                headers=headers
+            )
+        if resp.status_code == 304:
+            return None
+        if resp.status_code >= 400:
+            raise CalendarAPIError(resp.status_code, resp.text, dict(resp.headers))
+        return orjson.loads(resp.content) if resp.content else {}
+
+    async def _batch(
+        self,
+        access_token: str,
+        sub_requests: List[Tuple[str, str, Optional[Dict[str, Any]]]]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Send (method, path, body) sub-requests as one multipart/mixed batch call
+
+        Returns (status, body) for each sub-request, in the order given.
+        """
+        boundary = f"batch_{secrets.token_hex(8)}"
+        parts = []
+        for i, (method, path, body) in enumerate(sub_requests):
+            http_request = f"{method} /calendar/v3{path} HTTP/1.1\r\n"
+            if body is not None:
+                http_request += f"Content-Type: application/json\r\n\r\n{orjson.dumps(body).decode()}"
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <item-{i}>\r\n\r\n"
+                f"{http_request}\r\n"
+            )
+        payload = ("".join(parts) + f"--{boundary}--").encode()
+        return await self._with_retry(lambda: self._send_batch(access_token, payload, boundary, len(sub_requests)))
+
+    async def _send_batch(
+        self,
+        access_token: str,
+        payload: bytes,
+        boundary: str,
+        count: int
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Single attempt of a batch call"""
+        await self._acquire_rate(access_token, count)
+        async with self._sem(access_token), self._global_sem:
+            resp = await get_http_client().post(
+                CALENDAR_BATCH_URL,
+                content=payload,
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": f"multipart/mixed; boundary={boundary}"
+                }
+            )
+        if resp.status_code >= 400:
+            raise CalendarAPIError(resp.status_code, resp.text, dict(resp.headers))
+
+        boundary_match = _BOUNDARY_RE.search(resp.headers.get('Content-Type', ''))
+        if not boundary_match:
+            raise CalendarAPIError(resp.status_code, "Batch response is missing its multipart boundary")
+        return self._parse_batch_response(resp.content.decode('utf-8'), boundary_match.group(1), count)
+
+    @staticmethod
+    def _parse_batch_response(text: str, boundary: str, count: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Map each multipart response part back to its sub-request index"""
+        results = [(500, {'error': 'No response for batch item'})] * count
+        for part in text.replace('\r\n', '\n').split(f"--{boundary}"):
+            item_match = _BATCH_ITEM_RE.search(part)
+            status_match = _BATCH_STATUS_RE.search(part)
+            if not item_match or not status_match:
+                continue
+            sections = part[status_match.end():].split('\n\n', 1)
+            body = sections[1].strip() if len(sections) > 1 else ''
+            results[int(item_match.group(1))] = (int(status_match.group(1)), orjson.loads(body) if body else {})
+        return results
+
+    async def _batch_chunked(
+        self,
+        access_token: str,
+        sub_requests: List[Tuple[str, str, Optional[Dict[str, Any]]]]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Split sub-requests into BATCH_LIMIT-sized batches and send them concurrently"""
+        chunks = [sub_requests[i:i + BATCH_LIMIT] for i in range(0, len(sub_requests), BATCH_LIMIT)]
+        chunk_results = await asyncio.gather(*[self._batch(access_token, chunk) for chunk in chunks])
+        return [result for chunk in chunk_results for result in chunk]
+
+    @staticmethod
+    def _event_path(event_id: str) -> str:
+        return f"{EVENTS_PATH}/{quote(event_id, safe='')}"
+
+    @staticmethod
+    def _build_event_body(
+        title: str,
+        start_date: str,
+        end_date: str,
+        description: str = "",
+        attendees: List[str] = None,
+        location: str = "",
+        recurrence: List[str] = None
+    ) -> Dict[str, Any]:
+        """Build the Calendar API event resource for a new event"""
+        event = {
+            'summary': title,
+            'description': description,
+            'start': _event_time(start_date),
+            'end': _event_time(end_date)
+        }
 
-    def _get_calendar_service(self, access_token: str):
-        """Get or create Google Calendar API service instance"""
-        if access_token not in self.service_cache:
-            credentials = Credentials(token=access_token)
-            self.service_cache[access_token] = build('calendar', 'v3', credentials=credentials)
-        return self.service_cache[access_token]
+        if location:
+            event['location'] = location
+
+        if attendees:
+            event['attendees'] = [{'email': email} for email in attendees]
+
+        if recurrence:
+            event['recurrence'] = recurrence
+
+        return event
 
     async def create_event(
         self,
@@ -39,76 +408,190 @@ class GoogleCalendarConnector:
         """Create a calendar event with attendees"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
-            # Detect timezone from datetime string
-            # If no timezone specified, default to UTC
-            def detect_timezone(dt_string):
-                if 'Z' in dt_string:
-                    return 'UTC'
-                elif '+' in dt_string or dt_string.count('-') > 2:  # Has timezone offset like +05:30
-                    # Google Calendar will use the offset from the dateTime string
-                    return None  # Let Google infer from the string
-                else:
-                    # No timezone specified - default to UTC
-                    return 'UTC'
-
-            start_tz = detect_timezone(start_date)
-            end_tz = detect_timezone(end_date)
-
-            event = {
-                'summary': title,
-                'description': description,
-                'start': {
-                    'dateTime': start_date,
-                },
-                'end': {
-                    'dateTime': end_date,
-                }
+            event = self._build_event_body(title, start_date, end_date, description, attendees, location, recurrence)
+
+            created_event = await self._request(
+                access_token, 'POST', EVENTS_PATH,
+                params={'fields': EVENT_FIELDS}, json_body=event
+            )
+            await self._invalidate_cache(access_token)
+
+            return _format_event(created_event, status='created')
+
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
+            return {
+                'error': f"Failed to create calendar event: {str(e)}",
+                'status': 'error'
             }
-            
-            # Only add timeZone if explicitly needed
-            if start_tz:
-                event['start']['timeZone'] = start_tz
-            if end_tz:
-                event['end']['timeZone'] = end_tz
+        except Exception as e:
+            logger.error("Unexpected error creating calendar event: %s", e)
+            return {
+                'error': f"Unexpected error: {str(e)}",
+                'status': 'error'
+            }
+
+    async def create_events_batch(
+        self,
+        access_token: str,
+        events: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Create many events with batched requests
 
-            if location:
-                event['location'] = location
+        Each item takes the same keyword arguments as create_event.
+        """
 
-            if attendees:
-                event['attendees'] = [{'email': email} for email in attendees]
+        try:
+            sub_requests = [
+                ('POST', EVENTS_BATCH_INSERT_PATH, self._build_event_body(**event))
+                for event in events
+            ]
+            results = await self._batch_chunked(access_token, sub_requests)
+            await self._invalidate_cache(access_token)
+
+            created_events = []
+            failed = []
+            for index, (status, body) in enumerate(results):
+                if status >= 400:
+                    failed.append({'index': index, 'error': str(body.get('error', body))})
+                    continue
+                created_events.append(_format_event(body, status='created'))
 
-            if recurrence:
-                event['recurrence'] = recurrence
+            return {
+                'events': created_events,
+                'failed': failed,
+                'created_count': len(created_events),
+                'status': 'success' if not failed else ('partial' if created_events else 'error')
+            }
+
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
+            return {
+                'error': f"Failed to create calendar events: {str(e)}",
+                'events': [],
+                'failed': [],
+                'created_count': 0,
+                'status': 'error'
+            }
+        except Exception as e:
+            logger.error("Unexpected error creating calendar events: %s", e)
+            return {
+                'error': f"Unexpected error: {str(e)}",
+                'events': [],
+                'failed': [],
+                'created_count': 0,
+                'status': 'error'
+            }
 
-            created_event = service.events().insert(calendarId='primary', body=event).execute()
+    async def delete_events_batch(
+        self,
+        access_token: str,
+        event_ids: List[str]
+    ) -> Dict[str, Any]:
+        """Delete many events with batched requests"""
+
+        try:
+            sub_requests = [('DELETE', self._event_path(event_id), None) for event_id in event_ids]
+            results = await self._batch_chunked(access_token, sub_requests)
+            await self._invalidate_cache(access_token)
+
+            deleted = []
+            failed = []
+            for event_id, (status, body) in zip(event_ids, results):
+                if status >= 400:
+                    failed.append({'id': event_id, 'error': str(body.get('error', body))})
+                else:
+                    deleted.append(event_id)
 
             return {
-                'id': created_event['id'],
-                'title': created_event['summary'],
-                'start': created_event['start']['dateTime'],
-                'end': created_event['end']['dateTime'],
-                'description': created_event.get('description', ''),
-                'attendees': [attendee['email'] for attendee in created_event.get('attendees', [])],
-                'meeting_link': created_event.get('hangoutLink', ''),
-                'recurrence': created_event.get('recurrence', []),
-                'status': 'created'
+                'deleted': deleted,
+                'failed': failed,
+                'deleted_count': len(deleted),
+                'status': 'success' if not failed else ('partial' if deleted else 'error')
             }
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
-                'error': f"Failed to create calendar event: {str(e)}",
+                'error': f"Failed to delete calendar events: {str(e)}",
+                'deleted': [],
+                'failed': [],
+                'deleted_count': 0,
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error creating calendar event: {e}")
+            logger.error("Unexpected error deleting calendar events: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
+                'deleted': [],
+                'failed': [],
+                'deleted_count': 0,
                 'status': 'error'
             }
 
+    async def _events_page(
+        self,
+        access_token: str,
+        params: Dict[str, Any],
+        page_token: str = None
+    ) -> Dict[str, Any]:
+        """Fetch one page of primary calendar events"""
+        if page_token:
+            params = {**params, 'pageToken': page_token}
+        return await self._request(access_token, 'GET', EVENTS_PATH, params=params)
+
+    async def iter_events(
+        self,
+        access_token: str,
+        time_min: str = None,
+        time_max: str = None,
+        max_events: int = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield formatted upcoming events across pages
+
+        The next page is requested while the caller is still consuming the
+        current one. Raises CalendarAPIError if a page request fails.
+        """
+        # Default to now if no time_min provided
+        if not time_min:
+            time_min = datetime.now(timezone.utc).isoformat()
+
+        params = {
+            'timeMin': time_min,
+            'maxResults': min(max_events or EVENTS_PAGE_LIMIT, EVENTS_PAGE_LIMIT),
+            'singleEvents': 'true',
+            'orderBy': 'startTime',
+            'fields': EVENT_LIST_FIELDS
+        }
+        if time_max:
+            params['timeMax'] = time_max
+
+        yielded = 0
+        page = await self._events_page(access_token, params)
+        while True:
+            items = page.get('items', [])
+            next_token = page.get('nextPageToken')
+            wants_more = max_events is None or yielded + len(items) < max_events
+            next_page = (
+                asyncio.create_task(self._events_page(access_token, params, next_token))
+                if next_token and wants_more else None
+            )
+
+            try:
+                for event in items:
+                    yield _format_event(event)
+                    yielded += 1
+                    if max_events is not None and yielded >= max_events:
+                        return
+            except BaseException:
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+
+            if next_page is None:
+                return
+            page = await next_page
+
     async def list_events(
         self,
         access_token: str,
@@ -118,47 +601,25 @@ class GoogleCalendarConnector:
         """List upcoming calendar events"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
-            # Default to now if no time_min provided
-            if not time_min:
-                time_min = datetime.now(timezone.utc).isoformat()
+            cache_key = self._cache_key(access_token, 'list', max_results, time_min)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
 
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=time_min,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            formatted_events = [
+                event async for event in self.iter_events(access_token, time_min, max_events=max_results)
+            ]
 
-            events = events_result.get('items', [])
-
-            formatted_events = []
-            for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-
-                formatted_events.append({
-                    'id': event['id'],
-                    'title': event['summary'],
-                    'start': start,
-                    'end': end,
-                    'description': event.get('description', ''),
-                    'location': event.get('location', ''),
-                    'attendees': [attendee['email'] for attendee in event.get('attendees', [])],
-                    'meeting_link': event.get('hangoutLink', ''),
-                    'status': event['status']
-                })
-
-            return {
+            result = {
                 'events': formatted_events,
                 'total_count': len(formatted_events),
                 'status': 'success'
             }
+            await self._cache_set(cache_key, result)
+            return result
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to list calendar events: {str(e)}",
                 'events': [],
@@ -166,7 +627,7 @@ class GoogleCalendarConnector:
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error listing calendar events: {e}")
+            logger.error("Unexpected error listing calendar events: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'events': [],
@@ -182,35 +643,37 @@ class GoogleCalendarConnector:
         """Get a specific calendar event by ID"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
-            event = service.events().get(calendarId='primary', eventId=event_id).execute()
-
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-
-            return {
-                'id': event['id'],
-                'title': event['summary'],
-                'start': start,
-                'end': end,
-                'description': event.get('description', ''),
-                'location': event.get('location', ''),
-                'attendees': [attendee['email'] for attendee in event.get('attendees', [])],
-                'meeting_link': event.get('hangoutLink', ''),
-                'recurrence': event.get('recurrence', []),
-                'status': event['status'],
-                'event_status': 'found'
-            }
-
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+            cache_key = self._cache_key(access_token, 'get', event_id)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+            etag_key = (self._token_key(access_token), event_id)
+            etag_hit = self._etag_cache.get(etag_key)
+            event = await self._request(
+                access_token, 'GET', self._event_path(event_id),
+                params={'fields': f"{EVENT_FIELDS},etag"},
+                headers={'If-None-Match': etag_hit[0]} if etag_hit else None
+            )
+
+            if event is None:
+                # 304 Not Modified: the event hasn't changed since we last saw it
+                result = etag_hit[1]
+            else:
+                result = _format_event(event, event_status='found')
+                if event.get('etag'):
+                    self._etag_cache[etag_key] = (event['etag'], result)
+            await self._cache_set(cache_key, result)
+            return result
+
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to get calendar event: {str(e)}",
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error getting calendar event: {e}")
+            logger.error("Unexpected error getting calendar event: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'status': 'error'
@@ -225,44 +688,33 @@ class GoogleCalendarConnector:
         """Search calendar events by query"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
-            events_result = service.events().list(
-                calendarId='primary',
-                q=query,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            cache_key = self._cache_key(access_token, 'search', query, max_results)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+            events_result = await self._request(access_token, 'GET', EVENTS_PATH, params={
+                'q': query,
+                'maxResults': max_results,
+                'singleEvents': 'true',
+                'orderBy': 'startTime',
+                'fields': EVENT_LIST_FIELDS
+            })
 
             events = events_result.get('items', [])
 
-            formatted_events = []
-            for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-
-                formatted_events.append({
-                    'id': event['id'],
-                    'title': event['summary'],
-                    'start': start,
-                    'end': end,
-                    'description': event.get('description', ''),
-                    'location': event.get('location', ''),
-                    'attendees': [attendee['email'] for attendee in event.get('attendees', [])],
-                    'meeting_link': event.get('hangoutLink', ''),
-                    'recurrence': event.get('recurrence', []),
-                    'status': event['status']
-                })
+            formatted_events = [_format_event(event) for event in events]
 
-            return {
+            result = {
                 'events': formatted_events,
                 'total_count': len(formatted_events),
                 'status': 'success'
             }
+            await self._cache_set(cache_key, result)
+            return result
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to search calendar events: {str(e)}",
                 'events': [],
@@ -270,7 +722,7 @@ class GoogleCalendarConnector:
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error searching calendar events: {e}")
+            logger.error("Unexpected error searching calendar events: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'events': [],
@@ -278,6 +730,57 @@ class GoogleCalendarConnector:
                 'status': 'error'
             }
 
+    @staticmethod
+    def _free_gaps(
+        window_start: int,
+        window_end: int,
+        starts: "np.ndarray",
+        ends: "np.ndarray",
+        duration_minutes: int
+    ) -> List[Dict[str, Any]]:
+        """Gaps of at least duration_minutes between busy intervals (epoch seconds)"""
+        order = starts.argsort(kind='stable')
+        starts, ends = starts[order], ends[order]
+
+        # Gap i runs from the furthest busy end seen before interval i to its start;
+        # the last gap runs to the end of the window
+        gap_starts = np.maximum.accumulate(np.concatenate(([window_start], ends)))
+        gap_ends = np.concatenate((starts, [window_end]))
+        gap_seconds = gap_ends - gap_starts
+        keep = (gap_seconds > 0) & (gap_seconds >= duration_minutes * 60)
+
+        return [
+            {
+                'start': datetime.fromtimestamp(int(gap_start), timezone.utc).isoformat(),
+                'end': datetime.fromtimestamp(int(gap_end), timezone.utc).isoformat(),
+                'duration_minutes': int(seconds) / 60
+            }
+            for gap_start, gap_end, seconds in zip(gap_starts[keep], gap_ends[keep], gap_seconds[keep])
+        ]
+
+    async def _freebusy(
+        self,
+        access_token: str,
+        calendar_ids: List[str],
+        time_min: str,
+        time_max: str
+    ) -> List[Dict[str, str]]:
+        """Query free/busy for up to FREEBUSY_ITEMS_LIMIT calendars and return all busy periods"""
+        body = {
+            "timeMin": time_min,
+            "timeMax": time_max,
+            "timeZone": "UTC",
+            "items": [{"id": cal_id} for cal_id in calendar_ids]
+        }
+        freebusy_result = await self._request(
+            access_token, 'POST', '/freeBusy', params={'fields': FREEBUSY_FIELDS}, json_body=body
+        )
+        return [
+            busy
+            for cal_data in freebusy_result.get('calendars', {}).values()
+            for busy in cal_data.get('busy', [])
+        ]
+
     async def find_free_slots(
         self,
         access_token: str,
@@ -289,61 +792,26 @@ class GoogleCalendarConnector:
         """Find free time slots for scheduling"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
             # Include own calendar and attendees
             calendar_ids = ['primary']
             if attendees:
                 calendar_ids.extend(attendees)
 
-            body = {
-                "timeMin": time_min,
-                "timeMax": time_max,
-                "timeZone": "UTC",
-                "items": [{"id": cal_id} for cal_id in calendar_ids]
-            }
-
-            freebusy_result = service.freebusy().query(body=body).execute()
-
-            # Parse free/busy to find free slots
-            # This is a simplified version - in practice, you'd need more complex logic
-            busy_periods = []
-            for cal_id, cal_data in freebusy_result.get('calendars', {}).items():
-                busy_periods.extend(cal_data.get('busy', []))
-
-            # Sort busy periods
-            busy_periods.sort(key=lambda x: x['start'])
-
-            # Find gaps between busy periods
-            from datetime import datetime, timedelta
-            free_slots = []
-            current_time = datetime.fromisoformat(time_min.replace('Z', '+00:00'))
-            end_time = datetime.fromisoformat(time_max.replace('Z', '+00:00'))
-
-            for busy in busy_periods:
-                busy_start = datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
-                busy_end = datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
-
-                if busy_start > current_time:
-                    gap_duration = (busy_start - current_time).total_seconds() / 60
-                    if gap_duration >= duration_minutes:
-                        free_slots.append({
-                            'start': current_time.isoformat(),
-                            'end': busy_start.isoformat(),
-                            'duration_minutes': gap_duration
-                        })
-
-                current_time = max(current_time, busy_end)
-
-            # Check final gap
-            if end_time > current_time:
-                gap_duration = (end_time - current_time).total_seconds() / 60
-                if gap_duration >= duration_minutes:
-                    free_slots.append({
-                        'start': current_time.isoformat(),
-                        'end': end_time.isoformat(),
-                        'duration_minutes': gap_duration
-                    })
+            chunks = [
+                calendar_ids[i:i + FREEBUSY_ITEMS_LIMIT]
+                for i in range(0, len(calendar_ids), FREEBUSY_ITEMS_LIMIT)
+            ]
+            chunk_busy = await asyncio.gather(
+                *[self._freebusy(access_token, chunk, time_min, time_max) for chunk in chunks]
+            )
+            busy_periods = [busy for busy_list in chunk_busy for busy in busy_list]
+            free_slots = self._free_gaps(
+                _iso_to_epoch(time_min),
+                _iso_to_epoch(time_max),
+                np.fromiter((_iso_to_epoch(b['start']) for b in busy_periods), np.int64, len(busy_periods)),
+                np.fromiter((_iso_to_epoch(b['end']) for b in busy_periods), np.int64, len(busy_periods)),
+                duration_minutes
+            )
 
             return {
                 'free_slots': free_slots[:10],  # Limit to 10 suggestions
@@ -351,8 +819,8 @@ class GoogleCalendarConnector:
                 'status': 'success'
             }
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to find free slots: {str(e)}",
                 'free_slots': [],
@@ -360,7 +828,7 @@ class GoogleCalendarConnector:
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error finding free slots: {e}")
+            logger.error("Unexpected error finding free slots: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'free_slots': [],
@@ -383,107 +851,85 @@ class GoogleCalendarConnector:
         """Update an existing calendar event"""
 
         try:
-            service = self._get_calendar_service(access_token)
-
-            # First, get the existing event
-            event = service.events().get(calendarId='primary', eventId=event_id).execute()
-
-            # Update only provided fields
+            # Patch only the provided fields; arrays such as attendees and
+            # recurrence are replaced wholesale, so no read-modify-write is needed
+            patch_body = {}
             if title is not None:
-                event['summary'] = title
-            
+                patch_body['summary'] = title
+
             if start_date is not None:
-                # Detect timezone
-                def detect_timezone(dt_string):
-                    if 'Z' in dt_string:
-                        return 'UTC'
-                    elif '+' in dt_string or dt_string.count('-') > 2:
-                        return None
-                    else:
-                        return 'UTC'
-
-                start_tz = detect_timezone(start_date)
-                event['start'] = {'dateTime': start_date}
-                if start_tz:
-                    event['start']['timeZone'] = start_tz
-            
+                patch_body['start'] = _event_time(start_date)
+
             if end_date is not None:
-                def detect_timezone(dt_string):
-                    if 'Z' in dt_string:
-                        return 'UTC'
-                    elif '+' in dt_string or dt_string.count('-') > 2:
-                        return None
-                    else:
-                        return 'UTC'
-
-                end_tz = detect_timezone(end_date)
-                event['end'] = {'dateTime': end_date}
-                if end_tz:
-                    event['end']['timeZone'] = end_tz
-            
+                patch_body['end'] = _event_time(end_date)
+
             if description is not None:
-                event['description'] = description
-            
+                patch_body['description'] = description
+
             if location is not None:
-                event['location'] = location
-            
+                patch_body['location'] = location
+
             if attendees is not None:
-                event['attendees'] = [{'email': email} for email in attendees]
-            
+                patch_body['attendees'] = [{'email': email} for email in attendees]
+
             if recurrence is not None:
-                event['recurrence'] = recurrence
+                patch_body['recurrence'] = recurrence
 
-            # Update the event
-            updated_event = service.events().update(
-                calendarId='primary',
-                eventId=event_id,
-                body=event
-            ).execute()
+            params = {'fields': EVENT_FIELDS}
+            if attendees is None:
+                # Nothing for attendees to hear about, skip notification fan-out
+                params['sendUpdates'] = 'none'
 
-            return {
-                'id': updated_event['id'],
-                'title': updated_event['summary'],
-                'start': updated_event['start'].get('dateTime', updated_event['start'].get('date')),
-                'end': updated_event['end'].get('dateTime', updated_event['end'].get('date')),
-                'description': updated_event.get('description', ''),
-                'attendees': [attendee['email'] for attendee in updated_event.get('attendees', [])],
-                'meeting_link': updated_event.get('hangoutLink', ''),
-                'recurrence': updated_event.get('recurrence', []),
-                'status': 'updated'
-            }
+            updated_event = await self._request(
+                access_token, 'PATCH', self._event_path(event_id), params=params, json_body=patch_body
+            )
+            await self._invalidate_cache(access_token)
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+            return _format_event(updated_event, status='updated')
+
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to update calendar event: {str(e)}",
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error updating calendar event: {e}")
+            logger.error("Unexpected error updating calendar event: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'status': 'error'
             }
 
+    async def _get_title(self, access_token: str, event_id: str) -> str:
+        """Title of an event for confirmation messages, or a placeholder if it can't be read"""
+        try:
+            event = await self._request(access_token, 'GET', self._event_path(event_id), params={'fields': 'summary'})
+            return event.get('summary', 'Untitled Event')
+        except CalendarAPIError:
+            return 'Event'
+
     async def delete_event(
         self,
         access_token: str,
-        event_id: str
+        event_id: str,
+        include_title: bool = False
     ) -> Dict[str, Any]:
-        """Delete a calendar event"""
+        """Delete a calendar event
 
-        try:
-            service = self._get_calendar_service(access_token)
+        The title lookup costs an extra request, so it only runs when
+        include_title is set. It runs before the delete, since a lookup racing
+        the delete could find the event already gone.
+        """
 
-            # Get event details before deleting (for confirmation message)
-            try:
-                event = service.events().get(calendarId='primary', eventId=event_id).execute()
-                event_title = event.get('summary', 'Untitled Event')
-            except:
-                event_title = 'Event'
+        try:
+            if not include_title:
+                await self._request(access_token, 'DELETE', self._event_path(event_id))
+                await self._invalidate_cache(access_token)
+                return {'id': event_id, 'status': 'deleted'}
 
-            # Delete the event
-            service.events().delete(calendarId='primary', eventId=event_id).execute()
+            event_title = await self._get_title(access_token, event_id)
+            await self._request(access_token, 'DELETE', self._event_path(event_id))
+            await self._invalidate_cache(access_token)
 
             return {
                 'id': event_id,
@@ -492,14 +938,14 @@ class GoogleCalendarConnector:
                 'message': f"Successfully deleted event: {event_title}"
             }
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}")
+        except CalendarAPIError as e:
+            logger.error("Google Calendar API error: %s", e)
             return {
                 'error': f"Failed to delete calendar event: {str(e)}",
                 'status': 'error'
             }
         except Exception as e:
-            logging.error(f"Unexpected error deleting calendar event: {e}")
+            logger.error("Unexpected error deleting calendar event: %s", e)
             return {
                 'error': f"Unexpected error: {str(e)}",
                 'status': 'error'
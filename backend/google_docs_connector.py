@@ -2,159 +2,422 @@
 Google Docs Connector
 Integration with Google Docs API using existing Google OAuth infrastructure
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
+import asyncio
+import hashlib
 import logging
+import random
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+import httplib2
+import orjson
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
+from googleapiclient.model import JsonModel
+
+
+# Text longer than this is inserted as several smaller insertText requests
+INSERT_CHUNK_THRESHOLD = 500_000
+INSERT_CHUNK_SIZE = 100_000
+
+# Shared read-only default for .get() chains over API responses
+_EMPTY: Dict[str, Any] = {}
+
+DRIVE_PAGE_LIMIT = 1000  # Drive's maximum files.list pageSize
+DOCUMENT_MIME_TYPE = "application/vnd.google-apps.document"
+DOCUMENT_BASE_QUERY = f"mimeType='{DOCUMENT_MIME_TYPE}' and trashed=false"
+
+# Only the parts of a Docs body that text extraction reads; styling, suggestions,
+# inline objects and the rest of the document resource are left out
+DOCUMENT_TEXT_FIELDS = (
+    'body(content('
+    'paragraph(elements(textRun(content))),'
+    'table(tableRows(tableCells(content(paragraph(elements(textRun(content))))))),'
+    'sectionBreak))'
+)
+
+# Drive allows roughly 10 writes per second per user; pace and retry around it
+PER_TOKEN_CONCURRENCY = 10
+# Request pacing, kept under the Docs API's 300 requests/minute/user read
+# quota; batch sub-requests count individually
+PER_TOKEN_RATE_PER_MINUTE = 300
+RETRY_ATTEMPTS = 6
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Drive and Docs report per-user rate limiting as a 403 with one of these reasons
+RATE_LIMIT_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+# A brand-new file can briefly be missing or forbidden to the permissions API
+PERMISSION_RETRY_STATUSES = frozenset({403, 404, 500, 503})
+
+# httplib2.Http is not thread-safe, so each worker thread keeps its own
+# keep-alive connection pool and reuses it across calls and tokens
+_thread_local = threading.local()
+
+# Google calls run on their own small, long-lived pool rather than the default
+# executor, so the same few threads (and their open connections) serve every
+# call instead of connections being spread across short-lived threads
+GOOGLE_API_WORKERS = 16
+_executor = ThreadPoolExecutor(max_workers=GOOGLE_API_WORKERS, thread_name_prefix='google-api')
+
+# Parsed discovery documents, shared by every service built in the process
+_discovery_docs: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _discovery_doc(api: str, version: str) -> Optional[Dict[str, Any]]:
+    """Load and parse the discovery document bundled with the client library once"""
+    key = (api, version)
+    if key not in _discovery_docs:
+        doc = get_static_doc(api, version)
+        _discovery_docs[key] = orjson.loads(doc) if doc else None
+    return _discovery_docs[key]
+
+
+class OrjsonModel(JsonModel):
+    """JsonModel that parses and serializes bodies with orjson instead of json"""
+
+    def serialize(self, body_value):
+        if self._data_wrapper and isinstance(body_value, dict) and 'data' not in body_value:
+            body_value = {'data': body_value}
+        return orjson.dumps(body_value).decode()
+
+    def deserialize(self, content):
+        body = orjson.loads(content)
+        if self._data_wrapper and 'data' in body:
+            body = body['data']
+        return body
+
+
+# One service per API for the whole process. Requests only use a service to be
+# built; _execute sends them with per-call credentials over a pooled Http, so
+# nothing token-specific is held here and memory doesn't grow with tenants.
+_services: Dict[str, Any] = {}
+
+
+def _get_service(api: str, version: str):
+    """Get or build the token-independent service for an API"""
+    service = _services.get(api)
+    if service is None:
+        # The placeholder Http is never used to send requests
+        discovery_doc = _discovery_doc(api, version)
+        if discovery_doc is not None:
+            service = build_from_document(discovery_doc, http=httplib2.Http(), model=OrjsonModel())
+        else:
+            service = build(api, version, http=httplib2.Http(), cache_discovery=False, model=OrjsonModel())
+        _services[api] = service
+    return service
+
+
+def _thread_http() -> httplib2.Http:
+    """Get the calling thread's pooled Http, creating it on first use"""
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http(timeout=30)
+    return http
+
+
+def _execute_with_pooled_http(credentials: Credentials, request):
+    """Execute a request or batch over this thread's connection pool"""
+    return request.execute(http=AuthorizedHttp(credentials, http=_thread_http()))
+
+
+def _error_reasons(error: HttpError) -> set:
+    """The 'reason' codes listed in a Google API error response body"""
+    try:
+        body = orjson.loads(error.content or b'{}').get('error')
+    except (orjson.JSONDecodeError, AttributeError):
+        return set()
+    if not isinstance(body, dict):
+        return set()
+    items = (body.get('errors') or []) + (body.get('details') or [])
+    return {item.get('reason') for item in items if isinstance(item, dict)}
+
+
+def _is_retryable(error: HttpError) -> bool:
+    """Rate-limit and transient server errors worth retrying"""
+    status = error.resp.status
+    return status in RETRYABLE_STATUSES or (status == 403 and not RATE_LIMIT_REASONS.isdisjoint(_error_reasons(error)))
+
+
+def _escape_query_value(value: str) -> str:
+    """Escape a value for use inside a single-quoted Drive query string"""
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def _insert_text_requests(text: str, at_end: bool = False) -> List[Dict[str, Any]]:
+    """Build insertText requests for text at the start or end of the body
+
+    Large text is split into several inserts in the same batchUpdate. Chunks
+    for the start all go in at index 1 in reverse order, so no offsets (which
+    Docs counts in UTF-16 units) have to be worked out.
+    """
+    if len(text) <= INSERT_CHUNK_THRESHOLD:
+        chunks = [text]
+    else:
+        chunks = [text[i:i + INSERT_CHUNK_SIZE] for i in range(0, len(text), INSERT_CHUNK_SIZE)]
+
+    if at_end:
+        return [{'insertText': {'endOfSegmentLocation': {}, 'text': chunk}} for chunk in chunks]
+    return [{'insertText': {'location': {'index': 1}, 'text': chunk}} for chunk in reversed(chunks)]
+
+
+def _format_file(file: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape Drive file metadata into the document dict returned to agents"""
+    owners = file.get('owners') or ({},)
+    return {
+        'id': file['id'],
+        'title': file['name'],
+        'url': file.get('webViewLink', ''),
+        'created_time': file['createdTime'],
+        'modified_time': file['modifiedTime'],
+        'owner': owners[0].get('displayName', ''),
+        'shared': file.get('shared', False)
+    }
 
 
 class GoogleDocsConnector:
     """Wrapper around Google Docs API for document operations"""
 
     def __init__(self):
-        self.service_cache = {}  # Cache Docs service instances by access token
-        self.drive_service_cache = {}  # Cache Drive service instances by access token
+        # Per-token concurrency gates, dropped once no request holds them
+        self._sems: "weakref.WeakValueDictionary[bytes, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+        # Limiters must outlive individual requests to track the rate, so they
+        # expire a while after the last use instead of being weakly held
+        self._limiters: TTLCache = TTLCache(maxsize=4096, ttl=120)
+        # (token digest, document id, field mask) -> (modifiedTime, extracted text)
+        self._content_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+        # token digest -> Credentials, kept about as long as an access token lives
+        self._credentials: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+        # (method, token digest, document id, field mask) -> the in-flight fetch callers share
+        self._inflight: Dict[tuple, asyncio.Future] = {}
         logging.info("GoogleDocsConnector initialized")
 
-    def _get_docs_service(self, access_token: str):
-        """Get or create Google Docs API service instance"""
-        if access_token not in self.service_cache:
-            credentials = Credentials(token=access_token)
-            self.service_cache[access_token] = build('docs', 'v1', credentials=credentials)
-        return self.service_cache[access_token]
+    @staticmethod
+    def _token_key(access_token: str) -> bytes:
+        """Digest of an access token, so raw tokens are not kept as cache keys"""
+        return hashlib.blake2b(access_token.encode(), digest_size=16).digest()
+
+    def _get_docs_service(self):
+        """Get the shared Google Docs API service instance"""
+        return _get_service('docs', 'v1')
+
+    def _get_drive_service(self):
+        """Get the shared Google Drive API service instance"""
+        return _get_service('drive', 'v3')
+
+    def _get_credentials(self, access_token: str) -> Credentials:
+        """Get the Credentials shared by every Docs and Drive call for a token"""
+        key = self._token_key(access_token)
+        credentials = self._credentials.get(key)
+        if credentials is None:
+            credentials = self._credentials[key] = Credentials(token=access_token)
+        return credentials
+
+    def _sem(self, access_token: str) -> asyncio.Semaphore:
+        """Get the concurrency gate for an access token"""
+        key = self._token_key(access_token)
+        sem = self._sems.get(key)
+        if sem is None:
+            sem = self._sems[key] = asyncio.Semaphore(PER_TOKEN_CONCURRENCY)
+        return sem
+
+    async def _acquire_rate(self, access_token: str, amount: int = 1) -> None:
+        """Wait until the token may send `amount` more requests"""
+        key = self._token_key(access_token)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AsyncLimiter(PER_TOKEN_RATE_PER_MINUTE, 60)
+        # Re-insert on every use so the TTL is measured from the last request
+        self._limiters[key] = limiter
+        await limiter.acquire(amount)
+
+    async def _execute(self, access_token: str, request, amount: int = 1):
+        """Run a googleapiclient request or batch on the Google API thread pool
+
+        The call goes over the worker thread's pooled connections instead of
+        the placeholder Http bound to the shared service, which is not thread-safe.
+        `amount` is the number of requests a batch holds, for rate pacing.
+        Rate-limit and server errors are retried with jittered exponential backoff.
+        """
+        credentials = self._get_credentials(access_token)
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                await self._acquire_rate(access_token, amount)
+                async with self._sem(access_token):
+                    return await asyncio.get_running_loop().run_in_executor(
+                        _executor, _execute_with_pooled_http, credentials, request
+                    )
+            except HttpError as e:
+                if not _is_retryable(e) or attempt == RETRY_ATTEMPTS - 1:
+                    raise
+                delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+                logging.warning(f"Google API returned {e.resp.status}, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _permission_request(drive_service, document_id: str, role: str = 'reader', email: str = None):
+        """Build a permissions.create request for a user, or for anyone with the link"""
+        if email:
+            permission = {'type': 'user', 'role': role, 'emailAddress': email}
+        else:
+            permission = {'type': 'anyone', 'role': role, 'allowFileDiscovery': False}
+        return drive_service.permissions().create(
+            fileId=document_id,
+            body=permission,
+            sendNotificationEmail=False,
+            fields='id'
+        )
+
+    async def share_document(
+        self,
+        access_token: str,
+        document_id: str,
+        role: str = 'reader',
+        email: str = None
+    ) -> Dict[str, Any]:
+        """Share a Google Doc with a user, or with anyone who has the link when no email is given"""
 
-    def _get_drive_service(self, access_token: str):
-        """Get or create Google Drive API service instance"""
-        if access_token not in self.drive_service_cache:
-            credentials = Credentials(token=access_token)
-            self.drive_service_cache[access_token] = build('drive', 'v3', credentials=credentials)
-        return self.drive_service_cache[access_token]
+        try:
+            drive_service = self._get_drive_service()
+            permission = await self._execute(
+                access_token, self._permission_request(drive_service, document_id, role, email)
+            )
+
+            return {
+                'id': document_id,
+                'permission_id': permission['id'],
+                'shared_with': email or 'anyone with the link',
+                'role': role,
+                'status': 'shared'
+            }
+
+        except HttpError as e:
+            logging.error(f"Google Drive API error: {e}")
+            return {
+                'error': f"Failed to share document: {str(e)}",
+                'status': 'error'
+            }
+        except Exception as e:
+            logging.error(f"Unexpected error sharing document: {e}")
+            return {
+                'error': f"Unexpected error: {str(e)}",
+                'status': 'error'
+            }
 
     async def create_document(
         self,
         access_token: str,
         title: str,
         content: str = "",
-        folder_id: str = None
+        folder_id: str = None,
+        share_link: bool = True,
+        return_metadata: bool = True
     ) -> Dict[str, Any]:
-        """Create a new Google Doc with content"""
+        """Create a new Google Doc with content
+
+        The owner always has full access; share_link additionally makes the
+        document readable by anyone with the link. With return_metadata=False
+        the Drive read for timestamps and owner is skipped and the result holds
+        only the id, title, URL and sharing state.
+        """
 
         try:
-            docs_service = self._get_docs_service(access_token)
-            drive_service = self._get_drive_service(access_token)
+            docs_service = self._get_docs_service()
+            drive_service = self._get_drive_service()
 
             # Create the document
             doc_body = {
                 'title': title
             }
 
-            doc = docs_service.documents().create(body=doc_body).execute()
+            doc = await self._execute(access_token, docs_service.documents().create(body=doc_body, fields='documentId'))
             doc_id = doc.get('documentId')
 
             # If content is provided, add it to the document
             if content:
-                requests = []
-
                 # Insert content at the beginning
-                requests.append({
-                    'insertText': {
-                        'location': {
-                            'index': 1
-                        },
-                        'text': content
-                    }
-                })
-
-                # Execute the batch update
-                docs_service.documents().batchUpdate(
+                await self._execute(access_token, docs_service.documents().batchUpdate(
                     documentId=doc_id,
-                    body={'requests': requests}
-                ).execute()
-
-            # If folder_id is provided, move the document to that folder
-            if folder_id:
-                # Remove from root
-                drive_service.files().update(
-                    fileId=doc_id,
-                    removeParents='root',
-                    fields='id, parents'
-                ).execute()
+                    body={'requests': _insert_text_requests(content)}
+                ))
 
-                # Add to specified folder
-                drive_service.files().update(
-                    fileId=doc_id,
-                    addParents=folder_id,
-                    fields='id, parents'
-                ).execute()
+            # The folder move (or metadata read) and link sharing are independent,
+            # so send them together as one batch request
+            batch_responses = {}
+            batch_errors = {}
 
-            # Set proper permissions to ensure the document is accessible
-            # The document owner (authenticated user) should have full access by default
-            # No additional permissions needed for basic access
-            
-            permission_set = False  # Track if sharing permissions were successfully set
-            
-            try:
-                # Get the document details to confirm ownership
-                doc_details = drive_service.files().get(
-                    fileId=doc_id,
-                    fields='id, name, webViewLink, owners(displayName,emailAddress), shared'
-                ).execute()
-                
-                logging.info(f"Document created successfully: {doc_details.get('name')} owned by {doc_details.get('owners', [{}])[0].get('emailAddress', 'unknown')}")
-                
-                # Make the document accessible via link for easier access
-                # Sometimes permission setting fails immediately after creation, so add retry logic
-                import time
-                max_retries = 3
-                
-                for attempt in range(max_retries):
-                    try:
-                        permission = {
-                            'type': 'anyone',
-                            'role': 'reader',
-                            'allowFileDiscovery': False
-                        }
-                        drive_service.permissions().create(
-                            fileId=doc_id,
-                            body=permission,
-                            sendNotificationEmail=False
-                        ).execute()
-                        
-                        permission_set = True
-                        logging.info("Document shared with anyone who has the link")
-                        break
-                        
-                    except Exception as perm_error:
-                        logging.warning(f"Permission setting attempt {attempt + 1} failed: {perm_error}")
-                        if attempt < max_retries - 1:
-                            time.sleep(1)  # Wait 1 second before retry
-                        else:
-                            logging.error(f"Failed to set permissions after {max_retries} attempts")
-                
-                # Verify the permission was set correctly
-                if permission_set:
-                    try:
-                        permissions = drive_service.permissions().list(fileId=doc_id).execute()
-                        link_sharing_enabled = any(p.get('type') == 'anyone' and p.get('role') == 'reader' for p in permissions.get('permissions', []))
-                        logging.info(f"Link sharing verification: {'enabled' if link_sharing_enabled else 'failed'}")
-                    except Exception as verify_error:
-                        logging.warning(f"Could not verify permissions: {verify_error}")
+            def collect_results(request_id, response, exception):
+                if exception is not None:
+                    batch_errors[request_id] = exception
                 else:
-                    logging.warning("Permission setting failed - document may only be accessible to owner")
-                
-            except Exception as perm_error:
-                logging.warning(f"Could not set sharing permissions: {perm_error}")
-                # Continue anyway - the document should still be accessible to the owner
+                    batch_responses[request_id] = response
 
-            # Get the final document details
-            doc_details = drive_service.files().get(
-                fileId=doc_id,
-                fields='id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared, permissions'
-            ).execute()
+            details_fields = 'id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared'
+            batch = drive_service.new_batch_http_request(callback=collect_results)
+            if folder_id:
+                # Move the document from root to the folder in one update,
+                # which also returns the details so no separate read is needed
+                batch.add(drive_service.files().update(
+                    fileId=doc_id,
+                    addParents=folder_id,
+                    removeParents='root',
+                    fields=details_fields
+                ), request_id='details')
+            elif return_metadata:
+                batch.add(drive_service.files().get(fileId=doc_id, fields=details_fields), request_id='details')
+            if share_link:
+                batch.add(self._permission_request(drive_service, doc_id), request_id='share')
+            batch_size = bool(folder_id or return_metadata) + bool(share_link)
+            if batch_size:
+                await self._execute(access_token, batch, amount=batch_size)
+
+            if 'details' in batch_errors:
+                raise batch_errors['details']
+            doc_details = batch_responses.get('details')
+
+            # Sometimes permission setting fails immediately after creation, so retry
+            permission_set = share_link and 'share' not in batch_errors
+            max_retries = 3
+
+            for attempt in range(1, max_retries):
+                if permission_set or not share_link:
+                    break
+                share_error = batch_errors['share']
+                if not isinstance(share_error, HttpError) or share_error.resp.status not in PERMISSION_RETRY_STATUSES:
+                    break
+                logging.warning(f"Permission setting attempt {attempt} failed: {share_error}")
+                await asyncio.sleep(0.25 * 2 ** attempt + random.random() * 0.1)
+                try:
+                    await self._execute(access_token, self._permission_request(drive_service, doc_id))
+                    permission_set = True
+                except HttpError as perm_error:
+                    batch_errors['share'] = perm_error
+
+            if permission_set:
+                logging.info("Document shared with anyone who has the link")
+            elif share_link:
+                logging.error(f"Failed to set permissions after {max_retries} attempts: {batch_errors['share']}")
+                logging.warning("Permission setting failed - document may only be accessible to owner")
+
+            if doc_details is None:
+                logging.info(f"Document created successfully: {title}")
+                return {
+                    'id': doc_id,
+                    'title': title,
+                    'url': f"https://docs.google.com/document/d/{doc_id}/edit",
+                    'shared': permission_set,
+                    'sharing_enabled': permission_set,
+                    'status': 'created'
+                }
+
+            logging.info(f"Document created successfully: {doc_details.get('name')} owned by {doc_details.get('owners', [{}])[0].get('emailAddress', 'unknown')}")
 
             # Generate a fallback URL if webViewLink is not available
             web_view_link = doc_details.get('webViewLink', '')
@@ -170,8 +433,9 @@ class GoogleDocsConnector:
                 'modified_time': doc_details['modifiedTime'],
                 'owner': doc_details.get('owners', [{}])[0].get('displayName', ''),
                 'owner_email': doc_details.get('owners', [{}])[0].get('emailAddress', ''),
-                'shared': doc_details.get('shared', False),
-                'sharing_enabled': permission_set if 'permission_set' in locals() else False,
+                # Batched calls may run in any order, so the read can predate the share
+                'shared': permission_set or doc_details.get('shared', False),
+                'sharing_enabled': permission_set,
                 'status': 'created'
             }
 
@@ -191,44 +455,69 @@ class GoogleDocsConnector:
     async def get_document(
         self,
         access_token: str,
-        document_id: str
+        document_id: str,
+        fields: str = DOCUMENT_TEXT_FIELDS
+    ) -> Dict[str, Any]:
+        """Get a specific Google Doc by ID
+
+        fields is the Docs field mask for the content request; the default
+        covers everything the text extraction uses. Concurrent calls for the
+        same document, token and mask share one fetch.
+        """
+        key = ('get', self._token_key(access_token), document_id, fields)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(
+                self._fetch_document(access_token, document_id, fields)
+            )
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shielded so one caller being cancelled doesn't cancel the others' fetch
+        return dict(await asyncio.shield(future))
+
+    async def _fetch_document(
+        self,
+        access_token: str,
+        document_id: str,
+        fields: str
     ) -> Dict[str, Any]:
-        """Get a specific Google Doc by ID"""
+        """Fetch a Google Doc's metadata and text, reusing cached text if unchanged"""
 
         try:
-            docs_service = self._get_docs_service(access_token)
-            drive_service = self._get_drive_service(access_token)
+            docs_service = self._get_docs_service()
+            drive_service = self._get_drive_service()
 
-            # Get document metadata from Drive
-            doc_metadata = drive_service.files().get(
+            metadata_request = drive_service.files().get(
                 fileId=document_id,
-                fields='id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared, parents'
-            ).execute()
+                fields='id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared'
+            )
+            cache_key = (self._token_key(access_token), document_id, fields)
+            cached = self._content_cache.get(cache_key)
+
+            if cached is not None:
+                # Metadata is small; only re-download the body if the doc changed
+                doc_metadata = await self._execute(access_token, metadata_request)
+                if doc_metadata['modifiedTime'] == cached[0]:
+                    return {**_format_file(doc_metadata), 'content': cached[1], 'status': 'found'}
+                doc_content = await self._execute(access_token, docs_service.documents().get(documentId=document_id, fields=fields))
+            else:
+                # Metadata (Drive) and content (Docs) are independent, so fetch both at once
+                doc_metadata, doc_content = await asyncio.gather(
+                    self._execute(access_token, metadata_request),
+                    self._execute(access_token, docs_service.documents().get(documentId=document_id, fields=fields))
+                )
 
-            # Get document content from Docs
-            doc_content = docs_service.documents().get(documentId=document_id).execute()
-            
             # Debug logging
             logging.debug(f"Document content keys: {list(doc_content.keys()) if doc_content else 'None'}")
-            if 'body' in doc_content and 'content' in doc_content['body']:
-                logging.debug(f"Body content length: {len(doc_content['body']['content'])}")
+            logging.debug(f"Body content length: {len(doc_content.get('body', _EMPTY).get('content', ()))}")
 
             # Extract plain text content
             content_text = self._extract_text_from_doc(doc_content)
             
             logging.info(f"Successfully extracted content from document '{doc_metadata['name']}' - length: {len(content_text)} characters")
+            self._content_cache[cache_key] = (doc_metadata['modifiedTime'], content_text)
 
-            return {
-                'id': doc_metadata['id'],
-                'title': doc_metadata['name'],
-                'url': doc_metadata.get('webViewLink', ''),  # Use webViewLink which is valid
-                'content': content_text,
-                'created_time': doc_metadata['createdTime'],
-                'modified_time': doc_metadata['modifiedTime'],
-                'owner': doc_metadata.get('owners', [{}])[0].get('displayName', ''),
-                'shared': doc_metadata.get('shared', False),
-                'status': 'found'
-            }
+            return {**_format_file(doc_metadata), 'content': content_text, 'status': 'found'}
 
         except HttpError as e:
             logging.error(f"Google Docs API error: {e}")
@@ -243,42 +532,52 @@ class GoogleDocsConnector:
                 'status': 'error'
             }
 
+    @staticmethod
+    def _paragraph_runs(paragraph: Dict[str, Any]):
+        """Yield the non-empty text runs of a paragraph"""
+        for paragraph_element in paragraph.get('elements', ()):
+            text_run = paragraph_element.get('textRun')
+            if text_run:
+                content = text_run.get('content')
+                if content:
+                    yield content
+
+    def _iter_text_chunks(self, elements: List[Dict[str, Any]]):
+        """Yield the text pieces of structural elements in document order"""
+        for element in elements:
+            paragraph = element.get('paragraph')
+            if paragraph is not None:
+                empty = True
+                for content in self._paragraph_runs(paragraph):
+                    empty = False
+                    yield content
+                if empty:
+                    yield '\n'  # Empty paragraph
+                continue
+
+            table = element.get('table')
+            if table is not None:
+                # Handle tables: one tab-separated line per row
+                yield '\n[Table]\n'
+                for row in table['tableRows']:
+                    yield '\t'.join(
+                        ''.join(
+                            content
+                            for cell_element in cell['content']
+                            for content in self._paragraph_runs(cell_element.get('paragraph', _EMPTY))
+                        )
+                        for cell in row['tableCells']
+                    )
+                    yield '\n'
+                yield '\n'
+            elif 'sectionBreak' in element:
+                yield '\n'
+
     def _extract_text_from_doc(self, doc_content: Dict[str, Any]) -> str:
         """Extract plain text from Google Doc content"""
-        text_content = []
-        
         try:
-            if 'body' in doc_content and 'content' in doc_content['body']:
-                for element in doc_content['body']['content']:
-                    if 'paragraph' in element:
-                        paragraph_text = []
-                        for paragraph_element in element['paragraph']['elements']:
-                            if 'textRun' in paragraph_element and 'content' in paragraph_element['textRun']:
-                                paragraph_text.append(paragraph_element['textRun']['content'])
-                        if paragraph_text:
-                            text_content.append(''.join(paragraph_text))
-                        else:
-                            text_content.append('\n')  # Empty paragraph
-                    elif 'table' in element:
-                        # Handle tables
-                        text_content.append('\n[Table]\n')
-                        for row in element['table']['tableRows']:
-                            row_text = []
-                            for cell in row['tableCells']:
-                                cell_content = []
-                                for cell_element in cell['content']:
-                                    if 'paragraph' in cell_element:
-                                        for paragraph_element in cell_element['paragraph']['elements']:
-                                            if 'textRun' in paragraph_element and 'content' in paragraph_element['textRun']:
-                                                cell_content.append(paragraph_element['textRun']['content'])
-                                row_text.append(''.join(cell_content))
-                            text_content.append('\t'.join(row_text))
-                            text_content.append('\n')
-                        text_content.append('\n')
-                    elif 'sectionBreak' in element:
-                        text_content.append('\n')
-                        
-            extracted_text = ''.join(text_content).strip()
+            elements = doc_content.get('body', _EMPTY).get('content', ())
+            extracted_text = ''.join(self._iter_text_chunks(elements)).strip()
             logging.debug(f"Extracted {len(extracted_text)} characters from document")
             
             # If no content was extracted, provide a helpful message
@@ -292,6 +591,48 @@ class GoogleDocsConnector:
             logging.error(f"Document content structure: {doc_content.keys() if doc_content else 'None'}")
             return "[Error extracting content]"
 
+    async def _update_content(
+        self,
+        access_token: str,
+        docs_service,
+        document_id: str,
+        content: str,
+        append_content: bool
+    ) -> None:
+        """Append to or replace the body text of a document"""
+        requests = []
+
+        if append_content:
+            # Insert at the end of the body; no need to look up its index first
+            requests.extend(_insert_text_requests('\n' + content, at_end=True))
+        else:
+            # Replace all content
+            # First, get the current content length
+            doc = await self._execute(access_token, docs_service.documents().get(
+                documentId=document_id, fields='body/content(endIndex)'
+            ))
+            end_index = doc['body']['content'][-1]['endIndex'] if doc['body']['content'] else 1
+
+            # Delete existing content (except the last newline)
+            if end_index > 1:
+                requests.append({
+                    'deleteContentRange': {
+                        'range': {
+                            'startIndex': 1,
+                            'endIndex': end_index - 1
+                        }
+                    }
+                })
+
+            # Insert new content
+            requests.extend(_insert_text_requests(content))
+
+        # Execute batch update
+        await self._execute(access_token, docs_service.documents().batchUpdate(
+            documentId=document_id,
+            body={'requests': requests}
+        ))
+
     async def update_document(
         self,
         access_token: str,
@@ -303,72 +644,33 @@ class GoogleDocsConnector:
         """Update an existing Google Doc"""
 
         try:
-            docs_service = self._get_docs_service(access_token)
-            drive_service = self._get_drive_service(access_token)
+            docs_service = self._get_docs_service()
+            drive_service = self._get_drive_service()
 
-            requests = []
+            details_fields = 'id, name, webViewLink, modifiedTime'
 
-            # Update title if provided
+            # The rename goes through Drive and the content edit through Docs;
+            # they don't depend on each other, so run them side by side
+            updates = []
             if title:
-                drive_service.files().update(
+                updates.append(self._execute(access_token, drive_service.files().update(
                     fileId=document_id,
-                    body={'name': title}
-                ).execute()
-
-            # Update content if provided
+                    body={'name': title},
+                    fields=details_fields
+                )))
             if content:
-                if append_content:
-                    # Get current document to find end position
-                    doc = docs_service.documents().get(documentId=document_id).execute()
-                    end_index = doc['body']['content'][-1]['endIndex'] if doc['body']['content'] else 1
-
-                    requests.append({
-                        'insertText': {
-                            'location': {
-                                'index': end_index - 1
-                            },
-                            'text': '\n' + content
-                        }
-                    })
-                else:
-                    # Replace all content
-                    # First, get the current content length
-                    doc = docs_service.documents().get(documentId=document_id).execute()
-                    end_index = doc['body']['content'][-1]['endIndex'] if doc['body']['content'] else 1
-
-                    # Delete existing content (except the last newline)
-                    if end_index > 1:
-                        requests.append({
-                            'deleteContentRange': {
-                                'range': {
-                                    'startIndex': 1,
-                                    'endIndex': end_index - 1
-                                }
-                            }
-                        })
-
-                    # Insert new content
-                    requests.append({
-                        'insertText': {
-                            'location': {
-                                'index': 1
-                            },
-                            'text': content
-                        }
-                    })
-
-                # Execute batch update
-                if requests:
-                    docs_service.documents().batchUpdate(
-                        documentId=document_id,
-                        body={'requests': requests}
-                    ).execute()
-
-            # Get updated document details
-            doc_details = drive_service.files().get(
-                fileId=document_id,
-                fields='id, name, webViewLink, modifiedTime'
-            ).execute()
+                updates.append(self._update_content(access_token, docs_service, document_id, content, append_content))
+            results = await asyncio.gather(*updates)
+
+            if title and not content:
+                # Nothing else changed the file, so the rename response is current
+                doc_details = results[0]
+            else:
+                # Get updated document details
+                doc_details = await self._execute(access_token, drive_service.files().get(
+                    fileId=document_id,
+                    fields=details_fields
+                ))
 
             return {
                 'id': doc_details['id'],
@@ -391,48 +693,68 @@ class GoogleDocsConnector:
                 'status': 'error'
             }
 
+    async def iter_documents(
+        self,
+        access_token: str,
+        query: str = None,
+        folder_id: str = None,
+        max_results: int = None,
+        folder_ids: List[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield Google Docs, most recently modified first, following nextPageToken
+
+        Documents in any of folder_id/folder_ids are listed by one query rather
+        than one per folder. Raises HttpError if a page request fails.
+        """
+        drive_service = self._get_drive_service()
+
+        # Build query, escaping user input so quotes can't break the q syntax
+        clauses = [DOCUMENT_BASE_QUERY]
+
+        if query:
+            clauses.append(f"name contains '{_escape_query_value(query)}'")
+
+        folders = ([folder_id] if folder_id else []) + list(folder_ids or ())
+        if folders:
+            parents = ' or '.join(f"'{_escape_query_value(folder)}' in parents" for folder in folders)
+            clauses.append(f"({parents})" if len(folders) > 1 else parents)
+
+        search_query = ' and '.join(clauses)
+
+        yielded = 0
+        page_token = None
+        while True:
+            page_size = DRIVE_PAGE_LIMIT if max_results is None else min(max_results - yielded, DRIVE_PAGE_LIMIT)
+            results = await self._execute(access_token, drive_service.files().list(
+                q=search_query,
+                pageSize=page_size,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared)",
+                orderBy="modifiedTime desc"
+            ))
+
+            for file in results.get('files', ()):
+                yield _format_file(file)
+                yielded += 1
+
+            page_token = results.get('nextPageToken')
+            if not page_token or (max_results is not None and yielded >= max_results):
+                return
+
     async def list_documents(
         self,
         access_token: str,
         max_results: int = 10,
         query: str = None,
-        folder_id: str = None
+        folder_id: str = None,
+        folder_ids: List[str] = None
     ) -> Dict[str, Any]:
         """List Google Docs"""
 
         try:
-            drive_service = self._get_drive_service(access_token)
-
-            # Build query
-            mime_type = "application/vnd.google-apps.document"
-            search_query = f"mimeType='{mime_type}' and trashed=false"
-
-            if query:
-                search_query += f" and name contains '{query}'"
-
-            if folder_id:
-                search_query += f" and '{folder_id}' in parents"
-
-            results = drive_service.files().list(
-                q=search_query,
-                pageSize=max_results,
-                fields="files(id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared)",
-                orderBy="modifiedTime desc"
-            ).execute()
-
-            files = results.get('files', [])
-
-            formatted_docs = []
-            for file in files:
-                formatted_docs.append({
-                    'id': file['id'],
-                    'title': file['name'],
-                    'url': file['webViewLink'],
-                    'created_time': file['createdTime'],
-                    'modified_time': file['modifiedTime'],
-                    'owner': file.get('owners', [{}])[0].get('displayName', ''),
-                    'shared': file.get('shared', False)
-                })
+            formatted_docs = [
+                doc async for doc in self.iter_documents(access_token, query, folder_id, max_results, folder_ids)
+            ]
 
             return {
                 'documents': formatted_docs,
@@ -466,35 +788,11 @@ class GoogleDocsConnector:
         """Search Google Docs by content or title"""
 
         try:
-            drive_service = self._get_drive_service(access_token)
-
-            # Search by title first
-            mime_type = "application/vnd.google-apps.document"
-            title_query = f"mimeType='{mime_type}' and trashed=false and name contains '{query}'"
-
-            results = drive_service.files().list(
-                q=title_query,
-                pageSize=max_results,
-                fields="files(id, name, webViewLink, modifiedTime, createdTime, owners(displayName,emailAddress), shared)",
-                orderBy="modifiedTime desc"
-            ).execute()
-
-            files = results.get('files', [])
-
-            # If not enough results, we could search content, but Drive API doesn't support full-text search
-            # For now, just return title matches
-
-            formatted_docs = []
-            for file in files:
-                formatted_docs.append({
-                    'id': file['id'],
-                    'title': file['name'],
-                    'url': file['webViewLink'],
-                    'created_time': file['createdTime'],
-                    'modified_time': file['modifiedTime'],
-                    'owner': file.get('owners', [{}])[0].get('displayName', ''),
-                    'shared': file.get('shared', False)
-                })
+            # Drive API doesn't support full-text search of Docs bodies here,
+            # so this returns title matches
+            formatted_docs = [
+                doc async for doc in self.iter_documents(access_token, query, max_results=max_results)
+            ]
 
             return {
                 'documents': formatted_docs,
@@ -527,20 +825,21 @@ class GoogleDocsConnector:
         """Delete a Google Doc (move to trash)"""
 
         try:
-            drive_service = self._get_drive_service(access_token)
+            drive_service = self._get_drive_service()
 
             # Get document details before deleting
-            doc_details = drive_service.files().get(
+            doc_details = await self._execute(access_token, drive_service.files().get(
                 fileId=document_id,
                 fields='name'
-            ).execute()
+            ))
             doc_title = doc_details.get('name', 'Untitled Document')
 
             # Move to trash (soft delete)
-            drive_service.files().update(
+            await self._execute(access_token, drive_service.files().update(
                 fileId=document_id,
-                body={'trashed': True}
-            ).execute()
+                body={'trashed': True},
+                fields='id'
+            ))
 
             return {
                 'id': document_id,
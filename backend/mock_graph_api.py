@@ -2,24 +2,32 @@
 Enhanced Mock Microsoft Graph API with sophisticated operations
 """
 import asyncio
-import uuid
+import secrets
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from config import MOCK_LATENCY_MS
+
+
+async def _simulate_latency():
+    """Wait MOCK_LATENCY_MS to imitate a network call; returns at once when unset"""
+    if MOCK_LATENCY_MS > 0:
+        await asyncio.sleep(MOCK_LATENCY_MS / 1000)
+
 
 class EnhancedMockGraphAPI:
     @staticmethod
     async def send_email_with_invite(to: str, subject: str, body: str, meeting_details: Optional[Dict] = None):
         """Enhanced email sending with optional meeting invite"""
-        await asyncio.sleep(0.5)
+        await _simulate_latency()
         result = {
-            "id": f"enhanced-email-{uuid.uuid4()}",
+            "id": f"enhanced-email-{secrets.token_hex(16)}",
             "status": "sent",
             "to": to,
             "subject": subject,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "contains_meeting_invite": bool(meeting_details),
-            "meeting_link": f"https://teams.microsoft.com/meet/{uuid.uuid4()}" if meeting_details else None
+            "meeting_link": f"https://teams.microsoft.com/meet/{secrets.token_hex(16)}" if meeting_details else None
         }
 
         if meeting_details:
@@ -31,15 +39,15 @@ class EnhancedMockGraphAPI:
     async def create_calendar_event_with_attendees(title: str, start_date: str, end_date: str,
                                                  description: str = "", attendees: List[str] = None):
         """Enhanced calendar event creation with attendee management"""
-        await asyncio.sleep(0.4)
+        await _simulate_latency()
         return {
-            "id": f"enhanced-event-{uuid.uuid4()}",
+            "id": f"enhanced-event-{secrets.token_hex(16)}",
             "title": title,
             "start": start_date,
             "end": end_date,
             "description": description,
             "attendees": attendees or [],
-            "meeting_link": f"https://teams.microsoft.com/meet/{uuid.uuid4()}",
+            "meeting_link": f"https://teams.microsoft.com/meet/{secrets.token_hex(16)}",
             "status": "created",
             "notifications_sent": len(attendees or []) > 0
         }
@@ -47,16 +55,16 @@ class EnhancedMockGraphAPI:
     @staticmethod
     async def get_calendar_events():
         """Get calendar events with enhanced details"""
-        await asyncio.sleep(0.3)
+        await _simulate_latency()
         return [
             {
-                "id": f"event-{uuid.uuid4()}",
+                "id": f"event-{secrets.token_hex(16)}",
                 "title": "Sample Meeting",
                 "start": "2024-01-16T10:00:00Z",
                 "end": "2024-01-16T11:00:00Z",
                 "description": "Sample calendar event",
                 "attendees": ["user@example.com"],
-                "meeting_link": f"https://teams.microsoft.com/meet/{uuid.uuid4()}",
+                "meeting_link": f"https://teams.microsoft.com/meet/{secrets.token_hex(16)}",
                 "status": "confirmed"
             }
         ]
\ No newline at end of file
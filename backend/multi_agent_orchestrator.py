@@ -1,46 +1,181 @@
 """
 Enhanced Multi-Agent Orchestrator for collaborative workflows
 """
-from typing import Dict, Any
+import asyncio
+import functools
+import logging
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Tuple
 
 from calendar_agent import EnhancedCalendarAgent
 from notes_agent import EnhancedNotesAgent
 from file_summarizer_agent import EnhancedFileSummarizerAgent
+from semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+# Routing keyword categories as bit flags; a keyword counts wherever it
+# appears in the message, including inside longer words
+DOCUMENT, SUMMARIZE, CALENDAR, NOTE = 1, 2, 4, 8
+ROUTING_KEYWORDS = {
+    DOCUMENT: frozenset({"document", "file", "analyze"}),
+    SUMMARIZE: frozenset({"summarize", "notes", "save"}),
+    CALENDAR: frozenset({"calendar", "schedule"}),
+    NOTE: frozenset({"note", "remember"}),
+}
+
+_keywords = {word: flag for flag, words in ROUTING_KEYWORDS.items() for word in words}
+# A match also covers every keyword inside it (e.g. "notes" contains "note")
+_KEYWORD_FLAGS = {
+    word: sum({flag for other, flag in _keywords.items() if other in word})
+    for word in _keywords
+}
+# The lookahead finds keywords starting at every position, so overlapping
+# keywords are all seen in one pass; matching ignores case so the message
+# isn't copied by lower() first. ASCII-only case folding keeps every match a
+# key of _KEYWORD_FLAGS once lowered (Unicode folding lets 'ſ' match 's')
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(word) for word in sorted(_keywords, key=len, reverse=True)) + "))",
+    re.IGNORECASE | re.ASCII
+)
+
+
+def _keyword_flags(message: str) -> int:
+    """Bit flags of every keyword category found in a message"""
+    flags = 0
+    for match in _KEYWORD_RE.finditer(message):
+        flags |= _KEYWORD_FLAGS[match.group(1).lower()]
+    return flags
+
+
+# Routing decisions are shared between calls, so they are read-only
+_ROUTE_DOCUMENT = MappingProxyType({"workflow_type": "document_workflow", "agents": ("file", "notes")})
+_ROUTE_CALENDAR = MappingProxyType({"workflow_type": "calendar_task", "agents": ("calendar",)})
+_ROUTE_NOTES = MappingProxyType({"workflow_type": "notes_task", "agents": ("notes",)})
+_ROUTE_GENERAL = MappingProxyType({"workflow_type": "general", "agents": ("general",)})
+
+# Cosine similarity at which a paraphrase reuses an earlier routing decision
+ROUTE_SIMILARITY_THRESHOLD = 0.8
+
+
+@functools.lru_cache(maxsize=4096)
+def _classify(user_request: str) -> Mapping[str, Any]:
+    """Pick the workflow for a request; repeated requests skip the keyword scan"""
+    flags = _keyword_flags(user_request)
+
+    # Multi-agent workflow detection
+    if flags & DOCUMENT and flags & SUMMARIZE:
+        return _ROUTE_DOCUMENT
+    elif flags & CALENDAR:
+        return _ROUTE_CALENDAR
+    elif flags & NOTE:
+        return _ROUTE_NOTES
+    else:
+        return _ROUTE_GENERAL
+
+
+# Agents hold no per-orchestrator state, so one instance of each is built on
+# first use and shared by every orchestrator
+_AGENT_CLASSES = {
+    "calendar": EnhancedCalendarAgent,
+    "notes": EnhancedNotesAgent,
+    "file": EnhancedFileSummarizerAgent,
+}
+_agents: Dict[str, Any] = {}
+
+
+def _get_agent(name: str):
+    """Get the shared agent instance, creating it on first use"""
+    agent = _agents.get(name)
+    if agent is None:
+        agent = _agents[name] = _AGENT_CLASSES[name]()
+    return agent
+
+
+GENERAL_HELP_RESPONSE = "🚀 Hello! I'm your enhanced AI Agents assistant with advanced collaboration capabilities!\n\n🔗 **Multi-Agent Collaboration Features:**\n\n **Intelligent Calendar Agent** - Advanced scheduling with attendee management\n📝 **Enhanced Notes Agent** - Smart categorization and cross-referencing\n📄 **Advanced File Analyzer** - Deep insights with workflow recommendations\n\n⚡ **Enhanced Workflows Available:**\n• \"Schedule a meeting with John about project review\"\n• \"Analyze this document and save the key points to my notes\"\n• \"Create a team meeting and prepare meeting notes\"\n\nWhat enhanced workflow would you like me to help with?"
+
+
+def _agent_state(user_request: str) -> Dict[str, Any]:
+    """Fresh state for one agent run; agents only read user_request and context"""
+    return {"user_request": user_request, "context": {}}
+
+
+@dataclass(slots=True, frozen=True)
+class WorkflowResult:
+    """Outcome of a workflow, in the shape the chat API returns"""
+    response: str
+    agent_used: str
+    workflow_type: str
+    agents_involved: List[str]
+    collaboration_data: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "response": self.response,
+            "agent_used": self.agent_used,
+            "workflow_type": self.workflow_type,
+            "agents_involved": self.agents_involved,
+            "collaboration_data": self.collaboration_data
+        }
 
 
 class MultiAgentOrchestrator:
-    def __init__(self):
-        self.calendar_agent = EnhancedCalendarAgent()
-        self.notes_agent = EnhancedNotesAgent()
-        self.file_agent = EnhancedFileSummarizerAgent()
+    def __init__(self, semantic_routing: bool = False):
+        # Optional embedding cache of routing decisions (not responses), so a
+        # paraphrase with no routing keywords follows an earlier similar request
+        self._route_cache = SemanticCache(max_elements=10_000, threshold=ROUTE_SIMILARITY_THRESHOLD) if semantic_routing else None
+        self._route_cache_tasks = set()
+
+    @property
+    def calendar_agent(self) -> EnhancedCalendarAgent:
+        return _get_agent("calendar")
+
+    @property
+    def notes_agent(self) -> EnhancedNotesAgent:
+        return _get_agent("notes")
 
-    async def route_request(self, user_request: str) -> Dict[str, Any]:
+    @property
+    def file_agent(self) -> EnhancedFileSummarizerAgent:
+        return _get_agent("file")
+
+    async def route_request(self, user_request: str) -> Mapping[str, Any]:
         """Enhanced routing with multi-agent workflow detection"""
-        import logging
-        message = user_request.lower()
-        logging.info(f"Routing message: '{message}'")
-
-        # Multi-agent workflow detection
-        if any(word in message for word in ["document", "file", "analyze"]) and any(word in message for word in ["summarize", "notes", "save"]):
-            return {"workflow_type": "document_workflow", "agents": ["file", "notes"]}
-        elif any(word in message for word in ["calendar", "schedule"]):
-            return {"workflow_type": "calendar_task", "agents": ["calendar"]}
-        elif any(word in message for word in ["note", "remember"]):
-            return {"workflow_type": "notes_task", "agents": ["notes"]}
+        logger.info("Routing message: '%s'", user_request)
+        route = _classify(user_request)
+        if self._route_cache is None or not self._route_cache.enabled:
+            return route
+
+        if route is _ROUTE_GENERAL:
+            embedding = (await self._route_cache.embed_async([user_request]))[0]
+            cached = self._route_cache.lookup(embedding)
+            if cached is not None:
+                logger.info("Semantic routing cache hit: %s", cached["workflow_type"])
+                return cached
         else:
-            return {"workflow_type": "general", "agents": ["general"]}
+            # Remember the decision in the background so routing doesn't wait on it
+            task = asyncio.create_task(self._remember_route(user_request, route))
+            self._route_cache_tasks.add(task)
+            task.add_done_callback(self._route_cache_tasks.discard)
+        return route
+
+    async def _remember_route(self, user_request: str, route: Mapping[str, Any]) -> None:
+        """Add a keyword-routed request to the semantic routing cache"""
+        try:
+            embedding = (await self._route_cache.embed_async([user_request]))[0]
+            if self._route_cache.lookup(embedding) is None:
+                self._route_cache.add(embedding, route)
+        except Exception as e:
+            logger.warning("Failed to cache routing decision: %s", e)
 
-    async def document_workflow(self, user_request: str, session_id: str, file_content: str = None) -> Dict[str, Any]:
+    async def document_workflow(self, user_request: str, session_id: str, file_content: str = None) -> WorkflowResult:
         """Enhanced workflow: File Analysis + Notes collaboration"""
         results = {}
         agents_used = []
 
         # Step 1: Process with File Agent
-        state = {
-            "user_request": user_request,
-            "context": {},
-            "results": {}
-        }
+        state = _agent_state(user_request)
 
         file_result = await self.file_agent.process_request(state, file_content or user_request)
         results["file_analysis"] = file_result
@@ -56,68 +191,94 @@ class MultiAgentOrchestrator:
             agents_used.append("notes_agent")
 
         # Compile collaborative response
-        response_parts = []
-        for agent, result in results.items():
-            if result.get("message"):
-                response_parts.append(result["message"])
+        response = "\n\n".join(message for message in (result.get("message") for result in results.values()) if message)
 
-        return {
-            "response": "\n\n".join(response_parts) if response_parts else "✅ Document workflow completed successfully!",
-            "agent_used": "enhanced_multi_agent",
-            "workflow_type": "document_workflow",
-            "agents_involved": agents_used,
-            "collaboration_data": results
-        }
+        return WorkflowResult(
+            response=response or "✅ Document workflow completed successfully!",
+            agent_used="enhanced_multi_agent",
+            workflow_type="document_workflow",
+            agents_involved=agents_used,
+            collaboration_data=results
+        )
+
+    async def _calendar_task(self, user_request: str, session_id: str) -> WorkflowResult:
+        """Single-agent workflow: Calendar"""
+        result = await self.calendar_agent.process_request(_agent_state(user_request))
+        return WorkflowResult(
+            response=result.get("message", "Calendar task completed"),
+            agent_used="calendar_agent",
+            workflow_type="calendar_task",
+            agents_involved=["calendar_agent"],
+            collaboration_data=result.get("collaboration_data", {})
+        )
+
+    async def _notes_task(self, user_request: str, session_id: str) -> WorkflowResult:
+        """Single-agent workflow: Notes"""
+        result = await self.notes_agent.process_request(_agent_state(user_request))
+        return WorkflowResult(
+            response=result.get("message", "Notes task completed"),
+            agent_used="notes_agent",
+            workflow_type="notes_task",
+            agents_involved=["notes_agent"],
+            collaboration_data=result.get("collaboration_data", {})
+        )
+
+    async def _general_help(self, user_request: str, session_id: str) -> WorkflowResult:
+        """General help"""
+        return WorkflowResult(
+            response=GENERAL_HELP_RESPONSE,
+            agent_used="enhanced_orchestrator",
+            workflow_type="general",
+            agents_involved=[],
+            collaboration_data={}
+        )
+
+    # workflow_type -> workflow; anything else gets the general help
+    _WORKFLOWS = {
+        "document_workflow": document_workflow,
+        "calendar_task": _calendar_task,
+        "notes_task": _notes_task,
+    }
+
+    async def _run_workflow(self, user_request: str, session_id: str) -> WorkflowResult:
+        """Route a request and run the workflow it belongs to"""
+        if self._route_cache is None:
+            # Keyword routing does no I/O, so skip the route_request coroutine
+            logger.info("Routing message: '%s'", user_request)
+            routing_info = _classify(user_request)
+        else:
+            routing_info = await self.route_request(user_request)
+        workflow_type = routing_info["workflow_type"]
+        logger.info("Routed to workflow: %s", workflow_type)
+
+        workflow = self._WORKFLOWS.get(workflow_type, MultiAgentOrchestrator._general_help)
+        return await workflow(self, user_request, session_id)
 
     async def process_request(self, user_request: str, session_id: str) -> Dict[str, Any]:
         """Process user request through enhanced multi-agent workflow"""
-        import logging
-        logging.info(f"Processing request: '{user_request}' for session {session_id}")
+        logger.info("Processing request: '%s' for session %s", user_request, session_id)
 
         try:
-            # Route the request
-            routing_info = await self.route_request(user_request)
-            workflow_type = routing_info["workflow_type"]
-            logging.info(f"Routed to workflow: {workflow_type}")
-
-            # Execute appropriate workflow
-            if workflow_type == "document_workflow":
-                return await self.document_workflow(user_request, session_id)
-            elif workflow_type == "calendar_task":
-                state = {"user_request": user_request, "context": {}, "results": {}}
-                result = await self.calendar_agent.process_request(state)
-                return {
-                    "response": result.get("message", "Calendar task completed"),
-                    "agent_used": "calendar_agent",
-                    "workflow_type": "calendar_task",
-                    "agents_involved": ["calendar_agent"],
-                    "collaboration_data": result.get("collaboration_data", {})
-                }
-            elif workflow_type == "notes_task":
-                state = {"user_request": user_request, "context": {}, "results": {}}
-                result = await self.notes_agent.process_request(state)
-                return {
-                    "response": result.get("message", "Notes task completed"),
-                    "agent_used": "notes_agent",
-                    "workflow_type": "notes_task",
-                    "agents_involved": ["notes_agent"],
-                    "collaboration_data": result.get("collaboration_data", {})
-                }
-            else:
-                # General help
-                return {
-                    "response": "🚀 Hello! I'm your enhanced AI Agents assistant with advanced collaboration capabilities!\n\n🔗 **Multi-Agent Collaboration Features:**\n\n **Intelligent Calendar Agent** - Advanced scheduling with attendee management\n📝 **Enhanced Notes Agent** - Smart categorization and cross-referencing\n📄 **Advanced File Analyzer** - Deep insights with workflow recommendations\n\n⚡ **Enhanced Workflows Available:**\n• \"Schedule a meeting with John about project review\"\n• \"Analyze this document and save the key points to my notes\"\n• \"Create a team meeting and prepare meeting notes\"\n\nWhat enhanced workflow would you like me to help with?",
-                    "agent_used": "enhanced_orchestrator",
-                    "workflow_type": "general",
-                    "agents_involved": [],
-                    "collaboration_data": {}
-                }
-
+            result = await self._run_workflow(user_request, session_id)
         except Exception as e:
-            return {
-                "response": f"❌ Enhanced orchestration error: {str(e)}",
-                "agent_used": "error_handler",
-                "workflow_type": "error",
-                "agents_involved": [],
-                "collaboration_data": {}
-            }
\ No newline at end of file
+            # CancelledError is a BaseException, so cancellation still propagates
+            logger.error("Orchestration error: %s", e)
+            result = WorkflowResult(
+                response=f"❌ Enhanced orchestration error: {e!s}",
+                agent_used="error_handler",
+                workflow_type="error",
+                agents_involved=[],
+                collaboration_data={}
+            )
+        # Workflows pass results around as WorkflowResult; only the API gets a dict
+        return result.to_dict()
+
+    async def process_batch(self, requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Process several (user_request, session_id) pairs concurrently, in order
+
+        The agents have no batch APIs, so each request still runs its own
+        workflow; the batch shares one event-loop pass instead of queueing.
+        """
+        return await asyncio.gather(*(
+            self.process_request(user_request, session_id) for user_request, session_id in requests
+        ))
@@ -2,29 +2,247 @@
 Enhanced Notes Agent with Google Docs integration
 Intelligent note-taking with Google Docs operations using LLM
 """
+import asyncio
+import difflib
+import hashlib
 import json
+import logging
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
+import httpx
+from cachetools import LRUCache
 from openai import AsyncAzureOpenAI
 
 from google_docs_connector import GoogleDocsConnector
+from semantic_cache import SemanticCache, prior_turns
+
+# Optional faster fuzzy matcher for picking a document by title
+try:
+    from rapidfuzz import fuzz, process, utils
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+
+# Minimum title similarity for update/delete to act on a document; strict, since
+# a title sharing a single word with the query must not be changed or deleted
+MATCH_CONFIDENCE_THRESHOLD = 0.8
+
+# Similarity above which two requests are taken to extract to the same operation
+EXTRACTION_SIMILARITY_THRESHOLD = 0.95
+
+# Only these actions are reused for a merely similar request; the others change documents
+READ_ONLY_ACTIONS = frozenset({"view_all", "view_specific", "search"})
+
+# Static extraction instructions live in the system message so every request
+# shares the same prompt prefix and the service can serve it from its prompt cache
+EXTRACTION_SYSTEM_MESSAGE = """You are a notes management expert. Extract document operations from user requests precisely.
+
+You are a notes assistant that creates ALL notes and documents in Google Docs. Every user request for notes - whether simple notes, detailed documents, reminders, checklists, or ideas - should be handled as a Google Docs document creation.
+
+IMPORTANT: All notes go to Google Docs. There are no other services available.
+
+CRITICAL INSTRUCTIONS:
+1. Service is ALWAYS "google_docs" - all notes and documents go to Google Docs
+2. Action types: "create", "update", "delete", "view_all", "view_specific", "search"
+3. For CREATE: Extract title and content. If no title provided, generate one based on content
+4. For UPDATE: Extract document identifier (title/query or ID) and new content to add/append
+5. For DELETE: Extract the document identifier (title/query or ID)
+6. For VIEW_SPECIFIC: Extract document identifier to view content
+7. For SEARCH: Extract search query to find documents
+8. Content can be notes, meeting summaries, ideas, plans, reminders, checklists, etc. - ALL go to Google Docs
+9. For CREATE and UPDATE: if the user did not give the content explicitly, write it yourself in "generated_content" - comprehensive, well-structured notes for a new document, or well-structured content to append for an update. Otherwise leave "generated_content" empty
+
+EXAMPLES:
+- "take notes about our meeting" → service: "google_docs", action: "create", title: "Meeting Notes", content: "meeting discussion content"
+- "write a detailed report about the project" → service: "google_docs", action: "create", title: "Project Report", content: "detailed project analysis"
+- "add to my project notes" → service: "google_docs", action: "update", document_query: "project notes", content: "additional content"
+- "show me my meeting notes" → service: "google_docs", action: "view_specific", document_query: "meeting notes"
+- "delete old notes" → service: "google_docs", action: "delete", document_query: "old notes"
+- "find my project documents" → service: "google_docs", action: "search", search_query: "project"
+
+Return ONLY valid JSON:
+{
+    "service": "google_docs",
+    "action": "create|update|delete|view_all|view_specific|search",
+    "document_details": {
+        "title": "extracted or generated document title",
+        "content": "note content or content to add",
+        "append_content": true/false
+    },
+    "document_query": "for view_specific/update/delete: search term or document ID",
+    "search_query": "for search action: search terms",
+    "generated_content": "for create/update without explicit content: the written notes, else empty",
+    "collaboration_needed": []
+}"""
+
+EXTRACTION_PROMPT = """Current date: {current_date}
+Current time: {current_time}
+User request: '{user_message}'
+Context from other agents: {context}
+Recent conversation: {history_text}"""
+
+# Cached extractions are only reused while the prompt they came from is unchanged
+EXTRACTION_PROMPT_VERSION = hashlib.blake2b(
+    (EXTRACTION_SYSTEM_MESSAGE + EXTRACTION_PROMPT).encode(), digest_size=8
+).hexdigest()
+
+# Exact repeats of a request (e.g. re-sent after signing in) replay the earlier extraction
+EXACT_EXTRACTION_CACHE_SIZE = 1024
+
+
+# Prior turns included in the exact-match key; the loaded history is a sliding
+# window, so older turns would make a resent request miss
+EXACT_KEY_HISTORY_TURNS = 4
+
+
+def _history_for_key(conversation_history: List[str], user_message: str) -> str:
+    """The conversation a request's extraction depends on, for the exact-match key
+
+    Leaves out the request's own turn and, when the message is a resend, the
+    earlier identical turn and the replies to it, so a request re-sent after
+    e.g. signing in keys the same as the first attempt.
+    """
+    history = prior_turns(conversation_history, user_message)
+    turn = f"User: {user_message}"
+    for index in range(len(history) - 1, -1, -1):
+        if history[index] == turn:
+            history = history[:index]
+            break
+        if not history[index].startswith("Assistant: "):
+            break
+    return "\n".join(history[-EXACT_KEY_HISTORY_TURNS:])
+
+
+def _extraction_key(*parts: str) -> bytes:
+    """SHA-256 over length-prefixed parts, so no two part lists share a key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode()
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.digest()
+
+
+def _reusable_extraction(response_text: str, user_message: str) -> bool:
+    """Whether a cached extraction can answer a similar, not identical, request
+
+    Similar wording can still name another document ("Project Alpha notes" vs
+    "Project Beta notes"), so only read-only extractions are reused, and only
+    if every document or search term they hold appears in the request itself.
+    """
+    parsed = json.loads(response_text)
+    if parsed.get("action") not in READ_ONLY_ACTIONS:
+        return False
+    message = user_message.lower()
+    terms = (parsed.get("document_query"), parsed.get("search_query"))
+    return all(term.lower() in message for term in terms if isinstance(term, str) and term)
+
+
+def _fallback_score(query: str, query_words: set, title: str) -> float:
+    """Similarity of a lowered query and title without rapidfuzz
+
+    Drive's search already matched the query as a substring, so titles that
+    contain the query, or every word of it, count as full matches; partial
+    word overlap scores the share of query words found.
+    """
+    if query and query in title:
+        return 1.0
+    score = difflib.SequenceMatcher(None, query, title).ratio()
+    if query_words:
+        score = max(score, len(query_words & set(re.findall(r'\w+', title))) / len(query_words))
+    return score
+
+
+def _match_document(document_query: str, documents: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], float]:
+    """Pick the document whose title best matches the query, with a 0-1 score
+
+    A query that is a document ID matches that document exactly.
+    """
+    for doc in documents:
+        if doc['id'] == document_query:
+            return doc, 1.0
+
+    titles = {index: doc['title'] for index, doc in enumerate(documents)}
+    if HAS_RAPIDFUZZ:
+        # token_set_ratio scores a query whose words all appear in a title as a
+        # full match, and only partial credit for a single shared word
+        best = process.extractOne(document_query, titles, scorer=fuzz.token_set_ratio, processor=utils.default_process)
+        if best is None:
+            return None, 0.0
+        return documents[best[2]], best[1] / 100.0
+
+    query = document_query.lower()
+    query_words = set(re.findall(r'\w+', query))
+    scores = {
+        index: _fallback_score(query, query_words, title.lower())
+        for index, title in titles.items()
+    }
+    if not scores:
+        return None, 0.0
+    index = max(scores, key=scores.get)
+    return documents[index], scores[index]
+
+
+# One Azure OpenAI client, and so one warm connection pool, shared by every
+# notes agent instance in the process
+_llm_client: Optional[AsyncAzureOpenAI] = None
+
+
+def get_llm_client() -> AsyncAzureOpenAI:
+    """Get the shared Azure OpenAI client, creating it on first use"""
+    global _llm_client
+    if _llm_client is None or _llm_client.is_closed():
+        from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION
+
+        _llm_client = AsyncAzureOpenAI(
+            api_key=AZURE_OPENAI_API_KEY,
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_version=AZURE_OPENAI_API_VERSION,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
+    return _llm_client
+
+
+async def close_llm_client():
+    """Close the shared Azure OpenAI client (call on application shutdown)"""
+    global _llm_client
+    if _llm_client is not None and not _llm_client.is_closed():
+        await _llm_client.close()
+    _llm_client = None
 
 
 class EnhancedNotesAgent:
     def __init__(self):
         # Use Azure OpenAI like other agents
-        from config import AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION, AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
-        
-        self.llm = AsyncAzureOpenAI(
-            api_key=AZURE_OPENAI_API_KEY,
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-            api_version=AZURE_OPENAI_API_VERSION,
-        )
+        from config import AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
+
+        self.llm = get_llm_client()
         self.deployment_name = AZURE_OPENAI_CHAT_DEPLOYMENT_NAME
         self.system_message = "You are an enhanced Notes Agent that creates ALL notes and documents in Google Docs. Every note request - whether simple notes, detailed documents, reminders, or checklists - gets created as a Google Docs document with intelligent categorization and cross-referencing."
         self.model = self.deployment_name
         self.docs_connector = GoogleDocsConnector()
+        self.extraction_cache = SemanticCache(max_elements=10_000, threshold=EXTRACTION_SIMILARITY_THRESHOLD)
+        self.exact_extraction_cache: LRUCache = LRUCache(maxsize=EXACT_EXTRACTION_CACHE_SIZE)
+        # exact extraction key -> the in-flight extraction callers share
+        self._inflight_extractions: Dict[bytes, asyncio.Future] = {}
+
+    async def _extract(self, extraction_prompt: str) -> str:
+        """Run the extraction call and return the raw response text"""
+        response = await self.llm.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": EXTRACTION_SYSTEM_MESSAGE},
+                {"role": "user", "content": extraction_prompt}
+            ],
+            temperature=0.1
+        )
+        return response.choices[0].message.content
 
     async def process_request(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Process notes requests with Google Docs integration"""
@@ -37,59 +255,49 @@ class EnhancedNotesAgent:
         current_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         current_time = datetime.now(timezone.utc).strftime("%H:%M")
         
-        extraction_prompt = f"""
-        You are a notes assistant that creates ALL notes and documents in Google Docs. Every user request for notes - whether simple notes, detailed documents, reminders, checklists, or ideas - should be handled as a Google Docs document creation.
-        
-        IMPORTANT: All notes go to Google Docs. There are no other services available.
-        
-        Current date: {current_date}
-        Current time: {current_time}
-        User request: '{user_message}'
-        Context from other agents: {context}
-        Recent conversation: {history_text}
-
-        CRITICAL INSTRUCTIONS:
-        1. Service is ALWAYS "google_docs" - all notes and documents go to Google Docs
-        2. Action types: "create", "update", "delete", "view_all", "view_specific", "search"
-        3. For CREATE: Extract title and content. If no title provided, generate one based on content
-        4. For UPDATE: Extract document identifier (title/query or ID) and new content to add/append
-        5. For DELETE: Extract the document identifier (title/query or ID)
-        6. For VIEW_SPECIFIC: Extract document identifier to view content
-        7. For SEARCH: Extract search query to find documents
-        8. Content can be notes, meeting summaries, ideas, plans, reminders, checklists, etc. - ALL go to Google Docs
-
-        EXAMPLES:
-        - "take notes about our meeting" → service: "google_docs", action: "create", title: "Meeting Notes", content: "meeting discussion content"
-        - "write a detailed report about the project" → service: "google_docs", action: "create", title: "Project Report", content: "detailed project analysis"
-        - "add to my project notes" → service: "google_docs", action: "update", document_query: "project notes", content: "additional content"
-        - "show me my meeting notes" → service: "google_docs", action: "view_specific", document_query: "meeting notes"
-        - "delete old notes" → service: "google_docs", action: "delete", document_query: "old notes"
-        - "find my project documents" → service: "google_docs", action: "search", search_query: "project"
-
-        Return ONLY valid JSON:
-        {{
-            "service": "google_docs",
-            "action": "create|update|delete|view_all|view_specific|search",
-            "document_details": {{
-                "title": "extracted or generated document title",
-                "content": "note content or content to add",
-                "append_content": true/false
-            }},
-            "document_query": "for view_specific/update/delete: search term or document ID",
-            "search_query": "for search action: search terms",
-            "collaboration_needed": []
-        }}
-        """
+        extraction_prompt = EXTRACTION_PROMPT.format(
+            current_date=current_date,
+            current_time=current_time,
+            user_message=user_message,
+            context=context,
+            history_text=history_text,
+        )
 
-        response = await self.llm.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a notes management expert. Extract document operations from user requests precisely."},
-                {"role": "user", "content": extraction_prompt}
-            ],
-            temperature=0.1
+        # Standalone requests can reuse a read-only extraction of a similar earlier
+        # request made against the same prompt on the same day
+        cache_embedding = None
+        cache_version = (EXTRACTION_PROMPT_VERSION, current_date)
+        exact_key = _extraction_key(
+            user_message,
+            json.dumps(context, sort_keys=True, default=str),
+            _history_for_key(conversation_history, user_message),
+            self.model,
+            EXTRACTION_PROMPT_VERSION,
+            current_date,
         )
-        response_text = response.choices[0].message.content
+        cached = self.exact_extraction_cache.get(exact_key)
+        standalone = not prior_turns(conversation_history, user_message) and not context
+        if not cached and self.extraction_cache.enabled and standalone:
+            cache_embedding = (await self.extraction_cache.embed_async([user_message]))[0]
+            cached = self.extraction_cache.lookup(cache_embedding)
+            if cached and (cached["version"] != cache_version
+                           or not _reusable_extraction(cached["response_text"], user_message)):
+                cached = None
+
+        if cached:
+            logging.info("Extraction cache hit, skipping LLM call")
+            response_text = cached["response_text"]
+        else:
+            # Identical requests that arrive while one is being extracted share its call
+            future = self._inflight_extractions.get(exact_key)
+            if future is None:
+                future = self._inflight_extractions[exact_key] = asyncio.ensure_future(
+                    self._extract(extraction_prompt)
+                )
+                future.add_done_callback(lambda _: self._inflight_extractions.pop(exact_key, None))
+
+            # Shielded so one caller being cancelled doesn't cancel the others' call
+            response_text = await asyncio.shield(future)
 
         try:
             # Clean up response if it has markdown code blocks
@@ -99,6 +307,11 @@ class EnhancedNotesAgent:
                 response_text = response_text.split("```")[1].split("```")[0].strip()
             
             parsed_response = json.loads(response_text)
+            if not cached:
+                cache_entry = {"version": cache_version, "response_text": response_text}
+                self.exact_extraction_cache[exact_key] = cache_entry
+                if cache_embedding is not None and parsed_response.get("action") in READ_ONLY_ACTIONS:
+                    self.extraction_cache.add(cache_embedding, cache_entry)
             service = parsed_response.get("service", "google_docs")  # All notes go to Google Docs
             action = parsed_response.get("action", "create")
 
@@ -129,8 +342,9 @@ class EnhancedNotesAgent:
                     "collaboration_data": {}
                 }
 
-            # Generate content using LLM if not provided
-            content = document_details.get("content", "")
+            # Content the extraction call wrote is used as is; a second LLM
+            # call is only needed if it left both fields empty
+            content = document_details.get("content") or parsed_response.get("generated_content", "")
             if not content and user_message:
                 service_name = "Google Docs"
                 content_prompt = f"""
@@ -155,7 +369,8 @@ class EnhancedNotesAgent:
                 result = await self.docs_connector.create_document(
                     access_token=access_token,
                     title=document_details.get("title", "New Notes"),
-                    content=content
+                    content=content,
+                    return_metadata=False
                 )
                 service_name = "Google Docs"
 
@@ -403,77 +618,26 @@ class EnhancedNotesAgent:
                     "collaboration_data": {}
                 }
 
-            # STEP 2: Let LLM match user intent with actual documents
+            # STEP 2: Match the query against the titles found
             documents_list = search_result['documents']
-            documents_summary = "\n".join([
-                f"- ID: {doc['id']}, Title: '{doc['title']}', Modified: {doc['modified_time']}"
-                for doc in documents_list[:10]
-            ])
-
-            matching_prompt = f"""
-            User wants to update a document. Here are the ACTUAL documents from their Google Drive:
-            
-            {documents_summary}
-            
-            User's request: "{user_message}"
-            User's query: "{document_query}"
-            
-            Your task: Find the BEST matching document from the list above.
-            
-            Return ONLY valid JSON:
-            {{
-                "matched_document_id": "document ID from list above",
-                "confidence": 0.0-1.0,
-                "reason": "why this document matches"
-            }}
-            
-            If NO good match exists, return: {{"matched_document_id": null, "confidence": 0.0, "reason": "no match found"}}
-            """
-
-            match_response = await self.llm.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a document matching expert. Match user requests to actual Google Docs."},
-                    {"role": "user", "content": matching_prompt}
-                ],
-                temperature=0.1
-            )
-            match_text = match_response.choices[0].message.content
-
-            # Clean response
-            if "```json" in match_text:
-                match_text = match_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in match_text:
-                match_text = match_text.split("```")[1].split("```")[0].strip()
-
-            try:
-                match_result = json.loads(match_text)
-                document_id = match_result.get("matched_document_id")
-                confidence = match_result.get("confidence", 0.0)
-                
-                logging.info(f"📊 Document matching - ID: {document_id}, Confidence: {confidence}")
+            matched_doc, confidence = _match_document(document_query, documents_list[:10])
+            document_id = matched_doc['id'] if matched_doc else None
 
-                if not document_id or confidence < 0.5:
-                    return {
-                        "status": "error",
-                        "message": f"❌ Could not find a matching document for '{document_query}'. Reason: {match_result.get('reason', 'Low confidence match')}. Please check the document name and try again.",
-                        "collaboration_data": {}
-                    }
+            logging.info(f"📊 Document matching - ID: {document_id}, Confidence: {confidence:.2f}")
 
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse matching result: {e}")
+            if not document_id or confidence < MATCH_CONFIDENCE_THRESHOLD:
                 return {
                     "status": "error",
-                    "message": "❌ Failed to match document. Please try with more specific document details.",
+                    "message": f"❌ Could not find a matching document for '{document_query}'. Reason: Low confidence match. Please check the document name and try again.",
                     "collaboration_data": {}
                 }
 
             # STEP 3: Get update details and update the document
             document_details = parsed_response.get("document_details", {})
-            content = document_details.get("content", "")
+            content = document_details.get("content") or parsed_response.get("generated_content", "")
             append_content = document_details.get("append_content", True)
             
-            # Generate content using LLM if not provided
+            # Generate content using LLM if the extraction call didn't
             if not content and user_message:
                 content_prompt = f"""
                 Generate content to add to document from: '{user_message}'
@@ -549,75 +713,22 @@ class EnhancedNotesAgent:
                     "collaboration_data": {}
                 }
 
-            # STEP 2: Let LLM match user intent with actual documents
+            # STEP 2: Match the query against the titles found
             documents_list = search_result['documents']
-            documents_summary = "\n".join([
-                f"- ID: {doc['id']}, Title: '{doc['title']}', Modified: {doc['modified_time']}"
-                for doc in documents_list[:10]
-            ])
+            matched_doc, confidence = _match_document(document_query, documents_list[:10])
+            document_id = matched_doc['id'] if matched_doc else None
 
-            matching_prompt = f"""
-            User wants to delete a document. Here are the ACTUAL documents from their Google Drive:
-            
-            {documents_summary}
-            
-            User's request: "{user_message}"
-            User's query: "{document_query}"
-            
-            Your task: Find the BEST matching document from the list above.
-            
-            Return ONLY valid JSON:
-            {{
-                "matched_document_id": "document ID from list above",
-                "confidence": 0.0-1.0,
-                "reason": "why this document matches"
-            }}
-            
-            If NO good match exists, return: {{"matched_document_id": null, "confidence": 0.0, "reason": "no match found"}}
-            """
-
-            match_response = await self.llm.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a document matching expert. Match user requests to actual Google Docs."},
-                    {"role": "user", "content": matching_prompt}
-                ],
-                temperature=0.1
-            )
-            match_text = match_response.choices[0].message.content
-
-            # Clean response
-            if "```json" in match_text:
-                match_text = match_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in match_text:
-                match_text = match_text.split("```")[1].split("```")[0].strip()
-
-            try:
-                match_result = json.loads(match_text)
-                document_id = match_result.get("matched_document_id")
-                confidence = match_result.get("confidence", 0.0)
-                
-                logging.info(f"📊 Document matching - ID: {document_id}, Confidence: {confidence}")
+            logging.info(f"📊 Document matching - ID: {document_id}, Confidence: {confidence:.2f}")
 
-                if not document_id or confidence < 0.5:
-                    return {
-                        "status": "error",
-                        "message": f"❌ Could not find a matching document for '{document_query}'. Reason: {match_result.get('reason', 'Low confidence match')}. Please check the document name and try again.",
-                        "collaboration_data": {}
-                    }
-
-                # Find the matched document details for confirmation
-                matched_doc = next((d for d in documents_list if d['id'] == document_id), None)
-                doc_title = matched_doc['title'] if matched_doc else 'Document'
-
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse matching result: {e}")
+            if not document_id or confidence < MATCH_CONFIDENCE_THRESHOLD:
                 return {
                     "status": "error",
-                    "message": "❌ Failed to match document. Please try with more specific document details.",
+                    "message": f"❌ Could not find a matching document for '{document_query}'. Reason: Low confidence match. Please check the document name and try again.",
                     "collaboration_data": {}
                 }
 
+            doc_title = matched_doc['title']
+
             # STEP 3: Delete the document
             result = await self.docs_connector.delete_document(
                 access_token=access_token,
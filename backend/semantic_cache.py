@@ -0,0 +1,159 @@
+"""
+Semantic Response Cache for LLM-backed agents
+Reuses earlier responses for requests that are semantically similar, using an
+HNSW approximate nearest-neighbour index over sentence embeddings
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+# Optional dependencies - the cache disables itself when they are missing
+try:
+    import numpy as np
+    import hnswlib
+    HAS_HNSWLIB = True
+    logging.info("✅ hnswlib loaded successfully")
+except ImportError as e:
+    HAS_HNSWLIB = False
+    logging.warning(f"⚠️ hnswlib not available, semantic cache disabled: {e}")
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+    logging.info("✅ sentence-transformers loaded successfully")
+except ImportError as e:
+    HAS_SENTENCE_TRANSFORMERS = False
+    logging.warning(f"⚠️ sentence-transformers not available, semantic cache disabled: {e}")
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    HAS_ONNXRUNTIME = False
+
+from config import SEMANTIC_CACHE_ONNX_MODEL_DIR
+
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+SIMILARITY_THRESHOLD = 0.87
+
+
+def prior_turns(conversation_history: List[str], user_request: str) -> List[str]:
+    """Conversation history before the request being answered
+
+    The server saves each user message before the agents run, so history
+    loaded for a request ends with that request's own "User: ..." turn.
+    """
+    if conversation_history and conversation_history[-1] == f"User: {user_request}":
+        return conversation_history[:-1]
+    return conversation_history
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer-compatible encoder backed by an INT8 ONNX Runtime model
+
+    Build the model directory with:
+        optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 \
+            --task feature-extraction ./minilm-onnx
+        optimum-cli onnxruntime quantize --avx512_vnni --onnx_model ./minilm-onnx -o ./minilm-int8
+    """
+
+    def __init__(self, model_dir: str):
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._model = ORTModelForFeatureExtraction.from_pretrained(model_dir, provider='CPUExecutionProvider')
+
+    def encode(self, texts: List[str], batch_size: int = 8, normalize_embeddings: bool = True,
+               convert_to_numpy: bool = True):
+        """Mean-pool token embeddings the same way the MiniLM sentence model does"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self._tokenizer(texts[start:start + batch_size], padding=True, truncation=True, return_tensors='np')
+            hidden = self._model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'][..., None].astype(hidden.dtype)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+
+        embeddings = np.concatenate(batches)
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+
+def _load_encoder():
+    """Prefer the quantized ONNX model when configured, else the PyTorch model"""
+    if SEMANTIC_CACHE_ONNX_MODEL_DIR and HAS_ONNXRUNTIME:
+        logging.info(f"Loading INT8 ONNX embedding model from {SEMANTIC_CACHE_ONNX_MODEL_DIR}")
+        return OnnxSentenceEncoder(SEMANTIC_CACHE_ONNX_MODEL_DIR)
+    if SEMANTIC_CACHE_ONNX_MODEL_DIR:
+        logging.warning("⚠️ optimum[onnxruntime] not available, falling back to PyTorch embedding model")
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+class SemanticCache:
+    """Nearest-neighbour cache mapping request embeddings to stored responses"""
+
+    def __init__(self, max_elements: int = 100_000, threshold: float = SIMILARITY_THRESHOLD):
+        has_encoder = HAS_SENTENCE_TRANSFORMERS or bool(SEMANTIC_CACHE_ONNX_MODEL_DIR and HAS_ONNXRUNTIME)
+        self.enabled = HAS_HNSWLIB and has_encoder
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self._store: Dict[int, Any] = {}
+        self._next_id = 0
+
+        if not self.enabled:
+            return
+
+        try:
+            self._model = _load_encoder()
+            self._index = hnswlib.Index(space='cosine', dim=EMBEDDING_DIM)
+            # Full caches overwrite their oldest entries in place
+            self._index.init_index(max_elements=max_elements, ef_construction=200, M=16,
+                                   allow_replace_deleted=True)
+            logging.info("SemanticCache initialized successfully")
+        except Exception as e:
+            logging.error(f"Failed to initialize SemanticCache: {str(e)}")
+            self.enabled = False
+
+    def embed(self, texts: List[str]):
+        """Embed texts in one batched forward pass as normalized vectors"""
+        return self._model.encode(texts, batch_size=8, normalize_embeddings=True, convert_to_numpy=True)
+
+    async def embed_async(self, texts: List[str]):
+        """Embed texts on a worker thread so the event loop stays responsive"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed, texts)
+
+    def dedupe(self, texts: List[str], embeddings) -> List[str]:
+        """Drop texts that are near-duplicates of an earlier text in the list"""
+        kept, kept_embeddings = [], []
+        for text, embedding in zip(texts, embeddings):
+            if any(float(np.dot(embedding, other)) >= self.threshold for other in kept_embeddings):
+                continue
+            kept.append(text)
+            kept_embeddings.append(embedding)
+        return kept
+
+    def lookup(self, embedding) -> Optional[Any]:
+        """Return the stored value of the closest entry if it is similar enough"""
+        if not self.enabled or not self._store:
+            return None
+
+        ids, distances = self._index.knn_query(embedding, k=1)
+        if 1 - distances[0][0] >= self.threshold:
+            return self._store.get(int(ids[0][0]))
+        return None
+
+    def add(self, embedding, value: Any) -> None:
+        """Index an embedding and store the value it maps to, evicting the oldest entry when full"""
+        if not self.enabled:
+            return
+        if len(self._store) >= self.max_elements:
+            # _store keeps insertion order, so its first key is the oldest entry
+            oldest = next(iter(self._store))
+            self._index.mark_deleted(oldest)
+            del self._store[oldest]
+
+        self._index.add_items(embedding, np.array([self._next_id]), replace_deleted=True)
+        self._store[self._next_id] = value
+        self._next_id += 1
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Depends, Request
-from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -10,6 +10,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 import uuid
 import json
+import orjson
 
 # Import configuration
 from config import (
@@ -73,10 +74,13 @@ async def lifespan(app: FastAPI):
     # Startup
     yield
     # Shutdown
-    pass
+    from google_calendar_connector import close_http_client
+    await close_http_client()
+    from notes_agent import close_llm_client
+    await close_llm_client()
 
 # Create the main app with lifespan
-app = FastAPI(title="AI Agents POC", version="1.0.0", lifespan=lifespan)
+app = FastAPI(title="AI Agents POC", version="1.0.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware (MUST be added before routers)
 app.add_middleware(
@@ -268,7 +272,7 @@ async def stream_llm_response(message: str, session_id: str, agent_type: str = "
                 html_content = format_response_as_html(accumulated_text, agent_type)
 
                 # Send SSE event
-                yield f"data: {json.dumps({'html': html_content, 'text': accumulated_text})}\n\n"
+                yield f"data: {orjson.dumps({'html': html_content, 'text': accumulated_text}).decode()}\n\n"
                 await asyncio.sleep(0.01)  # Small delay for smooth streaming
 
         # Add final response to conversation history
@@ -286,10 +290,68 @@ async def stream_llm_response(message: str, session_id: str, agent_type: str = "
         await save_message(agent_message_doc)
 
         # Send completion event
-        yield f"data: {json.dumps({'complete': True, 'final_text': accumulated_text})}\n\n"
+        yield f"data: {orjson.dumps({'complete': True, 'final_text': accumulated_text}).decode()}\n\n"
 
     except Exception as e:
-        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        yield f"data: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+
+async def stream_general_response(message: str, session_id: str):
+    """Stream the general agent's response via SSE as tokens arrive"""
+    try:
+        user_message_doc = ChatMessage(
+            id=str(uuid.uuid4()),
+            message=message,
+            sender="user",
+            timestamp=datetime.now(timezone.utc),
+            session_id=session_id
+        )
+        await save_message(user_message_doc)
+
+        # Same history format the orchestrator hands to the general agent
+        messages = await get_chat_history_by_session(session_id)
+        conversation_history = [
+            f"{'User' if msg.sender == 'user' else 'Assistant'}: {msg.message}"
+            for msg in messages[-10:]
+        ]
+
+        agent_state = {
+            "user_request": message,
+            "conversation_history": conversation_history,
+            "context": {},
+            "results": {}
+        }
+
+        accumulated_text = ""
+        async for event in enhanced_orchestrator.general_agent.stream_request(agent_state):
+            if event["status"] == "streaming":
+                accumulated_text += event["delta"]
+                html_content = format_response_as_html(accumulated_text, "general_agent")
+                yield f"data: {orjson.dumps({'html': html_content, 'text': accumulated_text}).decode()}\n\n"
+            elif event["status"] == "error":
+                yield f"data: {orjson.dumps({'error': event['message']}).decode()}\n\n"
+                return
+            else:
+                # The final message (with its header) replaces the streamed text, so
+                # cached and template answers render the same way and the client
+                # shows exactly what is saved
+                final_text = event["message"]
+                html_content = format_response_as_html(final_text, "general_agent")
+                yield f"data: {orjson.dumps({'html': html_content, 'text': final_text}).decode()}\n\n"
+
+        agent_message_doc = ChatMessage(
+            id=str(uuid.uuid4()),
+            message=final_text,
+            sender="agent",
+            timestamp=datetime.now(timezone.utc),
+            session_id=session_id,
+            agent_type="general_agent"
+        )
+        await save_message(agent_message_doc)
+
+        yield f"data: {orjson.dumps({'complete': True, 'final_text': final_text}).decode()}\n\n"
+
+    except Exception as e:
+        yield f"data: {orjson.dumps({'error': str(e)}).decode()}\n\n"
 
 # Removed MockGraphAPI - using Google APIs instead
 
@@ -834,6 +896,22 @@ async def stream_chat_response(
         logging.error(f"Streaming chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error streaming response: {str(e)}")
 
+# SSE Streaming for the general agent - forwards LLM tokens as they are generated
+@api_router.post("/general/stream")
+async def stream_general_agent(chat_input: ChatMessageCreate, current_user: UserProfile = Depends(get_current_user)):
+    """Stream general agent responses via Server-Sent Events"""
+    if not enhanced_orchestrator:
+        raise HTTPException(status_code=503, detail="Enhanced agents not available")
+
+    return StreamingResponse(
+        stream_general_response(chat_input.message, chat_input.session_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+    )
+
 # Enhanced File Upload with Authentication
 @api_router.post("/upload")
 async def upload_file(
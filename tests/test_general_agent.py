@@ -0,0 +1,31 @@
+"""
+Tests for the general agent's template fast path
+"""
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from general_agent import ADD_TASK_RE
+
+
+@pytest.mark.parametrize("request_text, task", [
+    ("add task: buy milk", "buy milk"),
+    ("Add task:    call mom", "call mom"),
+    ("add task buy milk", "buy milk"),
+    ("Create a task to call the plumber", "call the plumber"),
+    ("new task renew passport", "renew passport"),
+])
+def test_add_task_re_matches_simple_commands(request_text, task):
+    assert ADD_TASK_RE.match(request_text).group(1) == task
+
+
+@pytest.mark.parametrize("request_text", [
+    "Create a task list for launching our product and prioritize it",
+    "create a task breakdown for the migration",
+    "new task management system for my team",
+    "add a task for the review",
+    "create a task plan for next sprint",
+    "add tasks",
+])
+def test_add_task_re_leaves_requests_about_tasks_to_the_llm(request_text):
+    assert ADD_TASK_RE.match(request_text) is None
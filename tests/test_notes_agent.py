@@ -0,0 +1,99 @@
+"""
+Tests for the notes agent's local helpers
+"""
+import json
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("googleapiclient")
+
+import notes_agent
+from notes_agent import (
+    MATCH_CONFIDENCE_THRESHOLD, _extraction_key, _history_for_key, _match_document, _reusable_extraction
+)
+
+DOCUMENTS = [
+    {"id": "doc-budget", "title": "2024 Annual Budget Review and Forecast"},
+    {"id": "doc-alpha", "title": "Project Alpha - Sprint Planning Notes"},
+    {"id": "doc-groceries", "title": "Groceries"},
+]
+
+
+@pytest.fixture(params=[True, False], ids=["rapidfuzz", "difflib"])
+def matcher(request, monkeypatch):
+    """Run each matching test with and without rapidfuzz"""
+    if request.param and not notes_agent.HAS_RAPIDFUZZ:
+        pytest.skip("rapidfuzz not installed")
+    monkeypatch.setattr(notes_agent, "HAS_RAPIDFUZZ", request.param)
+    return _match_document
+
+
+@pytest.mark.parametrize("query, expected_id", [
+    ("budget", "doc-budget"),
+    ("project notes", "doc-alpha"),
+    ("Sprint Planning", "doc-alpha"),
+    ("groceries", "doc-groceries"),
+])
+def test_match_document_accepts_titles_containing_the_query(matcher, query, expected_id):
+    doc, confidence = matcher(query, DOCUMENTS)
+    assert doc["id"] == expected_id
+    assert confidence >= MATCH_CONFIDENCE_THRESHOLD
+
+
+def test_match_document_matches_document_id_exactly(matcher):
+    doc, confidence = matcher("doc-groceries", DOCUMENTS)
+    assert doc["id"] == "doc-groceries"
+    assert confidence == 1.0
+
+
+@pytest.mark.parametrize("query, documents", [
+    ("holiday itinerary", DOCUMENTS),
+    ("project notes", [{"id": "doc-beta", "title": "Project Beta Launch Plan"}]),
+    ("budget meeting notes", [{"id": "doc-meeting", "title": "Meeting Agenda"}]),
+])
+def test_match_document_rejects_unrelated_query(matcher, query, documents):
+    _, confidence = matcher(query, documents)
+    assert confidence < MATCH_CONFIDENCE_THRESHOLD
+
+
+def test_match_document_with_no_documents(matcher):
+    assert matcher("budget", []) == (None, 0.0)
+
+
+@pytest.mark.parametrize("extraction, user_message, reusable", [
+    ({"action": "view_all"}, "list all my notes", True),
+    ({"action": "view_specific", "document_query": "Project Alpha notes"}, "open my project alpha notes", True),
+    ({"action": "view_specific", "document_query": "Project Alpha notes"}, "open my Project Beta notes", False),
+    ({"action": "search", "search_query": "budget"}, "find docs about the forecast", False),
+    ({"action": "delete", "document_query": "Project Alpha notes"}, "delete my Project Alpha notes", False),
+])
+def test_reusable_extraction(extraction, user_message, reusable):
+    assert _reusable_extraction(json.dumps(extraction), user_message) is reusable
+
+
+def _exact_key(conversation_history, user_message):
+    return _extraction_key(user_message, "{}", _history_for_key(conversation_history, user_message))
+
+
+def test_exact_key_matches_request_resent_after_sign_in():
+    earlier = ["User: hi", "Assistant: Hello! How can I help?"]
+    request = "take notes about the launch meeting"
+    first = earlier + [f"User: {request}"]
+    resent = first + [
+        "Assistant: ❌ Google Docs access requires authentication. Please sign in with Google.",
+        f"User: {request}",
+    ]
+    assert _exact_key(resent, request) == _exact_key(first, request)
+
+
+def test_exact_key_differs_when_history_differs():
+    request = "add the action items to it"
+    alpha = ["User: open my Project Alpha notes", "Assistant: Here are your Project Alpha notes", f"User: {request}"]
+    beta = ["User: open my Project Beta notes", "Assistant: Here are your Project Beta notes", f"User: {request}"]
+    assert _exact_key(alpha, request) != _exact_key(beta, request)
+
+
+def test_exact_key_length_prefix_separates_parts():
+    assert _extraction_key("ab", "c") != _extraction_key("a", "bc")
@@ -0,0 +1,43 @@
+"""
+Tests for the semantic response cache index
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("hnswlib")
+pytest.importorskip("dotenv")
+
+import semantic_cache
+from semantic_cache import EMBEDDING_DIM, SemanticCache
+
+
+@pytest.fixture
+def small_cache(monkeypatch):
+    """A three-entry cache that indexes hand-made vectors instead of text embeddings"""
+    monkeypatch.setattr(semantic_cache, "HAS_SENTENCE_TRANSFORMERS", True)
+    monkeypatch.setattr(semantic_cache, "_load_encoder", lambda: None)
+    cache = SemanticCache(max_elements=3, threshold=0.99)
+    assert cache.enabled
+    return cache
+
+
+def _vector(axis: int):
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[axis] = 1.0
+    return vector
+
+
+def test_full_cache_evicts_oldest_and_keeps_caching(small_cache):
+    for axis in range(5):
+        small_cache.add(_vector(axis), f"response {axis}")
+
+    assert small_cache.lookup(_vector(0)) is None
+    assert small_cache.lookup(_vector(1)) is None
+    for axis in range(2, 5):
+        assert small_cache.lookup(_vector(axis)) == f"response {axis}"
+    assert len(small_cache._store) == 3
+
+
+def test_lookup_misses_dissimilar_embedding(small_cache):
+    small_cache.add(_vector(0), "response 0")
+    assert small_cache.lookup(_vector(1)) is None